@@ -1,10 +1,42 @@
-import pandas as pd
 import numpy as np
-import random
 import itertools
+import math
+
+try:
+    from .Die import Die
+    from .Game import Game, split_rolls
+    from .Sampler import code_dtype
+    from .Encoding import key_fits, key_space, encode_rows, decode_keys
+    from .Exact import probability_matrix, jackpot_probabilities, permutation_probabilities, combination_probabilities
+    from .Reducers import STATISTICS, make_reducers
+    from .Sketch import HeavyHitterReducer
+    from .Metrics import instrumented, cache_event
+    from .Archive import PlayArchive
+except ImportError:
+    from Die import Die
+    from Game import Game, split_rolls
+    from Sampler import code_dtype
+    from Encoding import key_fits, key_space, encode_rows, decode_keys
+    from Exact import probability_matrix, jackpot_probabilities, permutation_probabilities, combination_probabilities
+    from Reducers import STATISTICS, make_reducers
+    from Sketch import HeavyHitterReducer
+    from Metrics import instrumented, cache_event
+    from Archive import PlayArchive
+
+#number of rolls handed to a reducer at a time, so the keys of a large (or memory-mapped) play are never built at once
+REDUCER_CHUNK_ROWS = 2**18
+
+def _analyze_worker(tables, num_of_rolls, seed_seq, dtype, chunk_size, statistics):
+    '''
+    PURPOSE
+    Stream rolls of a stacked alias table through fresh reducers in a worker process and return the reducers.
+    '''
+    reducers = make_reducers(statistics, tables.num_faces, tables.num_dice)
+    for codes in tables.stream(num_of_rolls, chunk_size, np.random.default_rng(seed_seq), dtype):
+        for reducer in reducers.values():
+            reducer.update(codes)
+    return reducers
 
-from Die import Die
-from Game import Game
 
 class Analyzer: 
     '''The purpose of the analyzer is to take the results of a single game and 
@@ -24,126 +56,508 @@ class Analyzer:
         self.game = game
         if type(self.game) !=  Game:
             raise ValueError("The game passed must be a Game object")
+        #reducers of the statistics computed so far and the game generation they belong to
+        self._reducers = {}
+        self._reducers_generation = None
+
+    def _reducer(self, statistic):
+        '''
+        PURPOSE
+        Return the reducer of a statistic for the most recent play. Reducers are kept between calls and only dropped when
+        the game is played again. When rolls were appended to the play since the last call, only the new rolls are counted.
+        The rolls are streamed through the reducer in chunks, so memory stays bounded for a play opened with load_play.
+        '''
+        codes = self.game.play_codes()
+        if self._reducers_generation != self.game.generation:
+            self._reducers = {}
+            self._reducers_generation = self.game.generation
+        reducer = self._reducers.get(statistic)
+        cache_event("Analyzer.reducers", reducer is not None and reducer.rolls == codes.shape[0])
+        if reducer is None:
+            reducer = make_reducers((statistic,), len(self.game.faces), codes.shape[1])[statistic]
+            self._reducers[statistic] = reducer
+        for chunk in self.game.play_chunks(REDUCER_CHUNK_ROWS, reducer.rolls):
+            reducer.update(chunk)
+        return reducer
         
     
-    def jackpot(self):
+    @instrumented("Analyzer.jackpot", rows = lambda analyzer, result: analyzer.game._play_codes.shape[0])
+    def jackpot(self, by_face = False, expected = False):
         '''
         PURPOSE
         A jackpot is a result in which all faces are the same, e.g. all ones for a six-sided die. 
         Computes how many times the game resulted in a jackpot.
+        Every die column is compared with the first die column, so the work grows linearly with the size of the play.
+        The counts are kept until the game is played again, and rolls appended to the play are added to them.
+
+        INPUTS
+        by_face     optional boolean, when True the jackpots are broken down by the face that was rolled.
+        expected    optional boolean, when True the jackpots are broken down by face next to an Expected column
+                    with the exact expected number of jackpots for the number of rolls, computed from the die weights.
 
         OUTPUTS 
         Returns an integer for the number of jackpots.
+        When by_face or expected is True, returns a data frame with the faces as the index and a column Jackpots with the counts.
         '''
-        counter = 0 
-        dfj = self.game.play_result()
-        
-        for i in dfj.index:
-            tempdf = dfj[dfj.index == i]
-            myvals = np.array(tempdf.values)
-            if (len(np.unique(myvals)) == 1):
-                counter +=1 
-        return counter
+        codes = self.game.play_codes()
+        jackpots = self._reducer("jackpot").jackpots.copy()
+        if expected:
+            jackpot_frame = self._jackpot_frame(jackpots)
+            jackpot_frame['Expected'] = codes.shape[0] * jackpot_probabilities(probability_matrix(self.game.similar_dice))
+            return jackpot_frame
+        if by_face:
+            return self._jackpot_frame(jackpots)
+        return int(jackpots.sum())
+
+    def _jackpot_frame(self, jackpots):
+        '''
+        PURPOSE
+        Put jackpot counts per face into a dataframe indexed by face.
+        '''
+        import pandas as pd
+        return pd.DataFrame({'Jackpots': jackpots}, index = pd.Index(self.game.faces, name = 'Faces'))
         
-    def face_counts_per_roll(self):
+    @instrumented("Analyzer.face_counts_per_roll", rows = lambda analyzer, result: analyzer.game._play_codes.shape[0])
+    def face_counts_per_roll(self, sparse = False):
         '''
         PURPOSE
         Computes how many times a given face is rolled in each event.
+        The counts are added straight from the face codes into a dense (rolls x faces) integer array, one die at a time.
+
+        INPUTS
+        sparse      optional boolean, when True the data frame holds sparse columns, which saves memory for dice
+                    with many faces. Needs scipy.
 
         OUTPUTS 
         Returns a data frame of results.
         The data frame has an index of the roll number, 
         face values as columns, and count values in the cells.
         '''
-        dfh = self.game.play_result("narrow")
-        face_counts = dfh.groupby(["Roll Number", "Outcomes"]).Outcomes.value_counts().unstack().fillna(0)
-        return face_counts
+        import pandas as pd
+        codes = self.game.play_codes()
+        num_rolls, num_dice = codes.shape
+        num_faces = len(self.game.faces)
+        index = pd.RangeIndex(1, num_rolls + 1, name = 'Roll Number')
+        columns = pd.Index(self.game.faces, name = 'Outcomes')
+
+        if sparse:
+            try:
+                from scipy.sparse import csr_matrix
+            except ImportError:
+                raise ImportError("face_counts_per_roll with sparse=True needs scipy")
+            rows = np.repeat(np.arange(num_rolls), num_dice)
+            ones = np.ones(num_rolls * num_dice, dtype=np.min_scalar_type(num_dice))
+            counts = csr_matrix((ones, (rows, codes.ravel())), shape=(num_rolls, num_faces))
+            return pd.DataFrame.sparse.from_spmatrix(counts, index = index, columns = columns)
 
-    def combo_count(self):
+        counts = np.zeros((num_rolls, num_faces), dtype=np.min_scalar_type(num_dice))
+        flat_counts = counts.reshape(-1)
+        row_starts = np.arange(num_rolls, dtype=np.intp) * num_faces
+        #a die shows one face per roll, so the positions updated in one pass never repeat
+        for die in range(num_dice):
+            flat_counts[row_starts + codes[:, die]] += 1
+        return pd.DataFrame(counts, index = index, columns = columns)
+
+    @instrumented("Analyzer.combo_count", rows = lambda analyzer, result: analyzer.game._play_codes.shape[0])
+    def combo_count(self, include_unobserved = False, expected = False):
         '''
         PURPOSE
         Computes the distinct combinations of faces rolled, along with their counts.
         Combinations are order-independent and may contain repetitions.
+        Each roll is reduced to its face-count vector (how many dice show each face), which is encoded as one
+        integer key and counted in a single vectorized pass. The counts are kept until the game is played again,
+        and rolls appended to the play are added to them.
+
+        INPUTS
+        include_unobserved    optional boolean, when True the combinations that were never rolled are added with a count of zero.
+        expected              optional boolean, when True an Expected column is added with the exact expected count of each
+                              combination for the number of rolls, computed from the die weights.
 
         OUTPUTS 
         Returns a data frame of results with distinct combinations and a column for the associated counts.
         '''
-        mygameresult = self.game.play_result()
-        combinations_list = mygameresult.values.tolist()
+        codes = self.game.play_codes()
+        rows, counts = self._reducer("combo_count").result()
+        if include_unobserved:
+            unobserved = np.array(list(self._unobserved_combination_codes()), dtype=np.int64).reshape(-1, codes.shape[1])
+            rows = np.concatenate([rows, unobserved], axis=0)
+            counts = np.concatenate([counts, np.zeros(len(unobserved), dtype=np.int64)])
 
-        for i in combinations_list:
-            i = sorted(i)
+        combinations = self._count_frame(rows, counts, 'Combinations')
+        if expected:
+            probabilities = probability_matrix(self.game.similar_dice)
+            combinations['Expected'] = codes.shape[0] * combination_probabilities(probabilities, rows)
+        return combinations
 
-        df = pd.DataFrame(
-            {
-                'Combinations': combinations_list,
-                'Counts': 1
-            })
-        
-        full_combinations_list = list(itertools.combinations_with_replacement((np.unique(mygameresult.values)).tolist(), len(mygameresult.columns.tolist())))
-
-        #for i, val in enumerate(combinations_list):
-        newlist = []
-
-        for j in full_combinations_list:
-            if sorted(list(j)) not in combinations_list:
-                newlist.append(list(j))
-
-        df_combos2 = pd.DataFrame(
-            {
-                'Combinations': newlist,
-                'Counts': 0
-            })
-                
+    def unobserved_combinations(self):
+        '''
+        PURPOSE
+        Lists the combinations of faces that were never rolled in the most recent play. The combinations are
+        generated lazily, so the full space of combinations is never held in memory.
 
-        df_combos_final = pd.concat([df, df_combos2], axis=0)
-        df_combos_final_ = df_combos_final.set_index(['Combinations'])
-        return df_combos_final_    
+        OUTPUTS
+        a generator of tuples of faces, each in the order the faces appear on the die.
+        '''
+        faces = self.game.faces
+        for combination in self._unobserved_combination_codes():
+            yield tuple(faces[list(combination)].tolist())
 
-    
+    def _unobserved_combination_codes(self):
+        '''
+        PURPOSE
+        Lazily list the combinations of face codes that were never rolled in the most recent play.
+        '''
+        codes = self.game.play_codes()
+        observed = set(map(tuple, self._reducer("combo_count").result()[0].tolist()))
+        for combination in itertools.combinations_with_replacement(range(len(self.game.faces)), codes.shape[1]):
+            if combination not in observed:
+                yield combination
 
-    def permutation_count(self):
+    @instrumented("Analyzer.permutation_count", rows = lambda analyzer, result: analyzer.game._play_codes.shape[0])
+    def permutation_count(self, include_unobserved = False, expected = False):
         '''
         PURPOSE
         Computes the distinct permutations of faces rolled, along with their counts. Permutations are order-dependent and 
         may contain repetitions.
+        Each roll is encoded as one integer key (a mixed-radix number with one digit per die) and the keys are
+        counted in a single vectorized pass. The counts are kept until the game is played again,
+        and rolls appended to the play are added to them.
+
+        INPUTS
+        include_unobserved    optional boolean, when True the permutations that were never rolled are added with a count of zero.
+        expected              optional boolean, when True an Expected column is added with the exact expected count of each
+                              permutation for the number of rolls, computed from the die weights.
 
         OUTPUTS 
         a dataframe summarizing the distinct permutation and a column for the associated counts
         '''
-        mygameresult = self.game.play_result()
-        permutations_list = mygameresult.values.tolist()
-
-        df_permutations = pd.DataFrame(
-            {
-                'permutations': permutations_list,
-                'Counts': 0
-            })
-        permutationlist = []
-        for i, element in enumerate(permutations_list):
-            if list(df_permutations.loc[i]) in permutationlist:
-                currentval = df_permutations.loc[i, "Counts"] #fix this line to pull the appropriate value
-                newval = currentval + 1
-                df_permutations.loc[i, "Counts"] = newval
+        codes = self.game.play_codes()
+        rows, counts = self._reducer("permutation_count").result()
+        if include_unobserved:
+            unobserved = [rows[:0]] + list(self._unobserved_permutation_blocks())
+            unobserved = np.concatenate(unobserved, axis=0)
+            rows = np.concatenate([rows, unobserved], axis=0)
+            counts = np.concatenate([counts, np.zeros(len(unobserved), dtype=np.int64)])
+
+        permutations = self._count_frame(rows, counts, 'permutations')
+        if expected:
+            probabilities = probability_matrix(self.game.similar_dice)
+            permutations['Expected'] = codes.shape[0] * permutation_probabilities(probabilities, rows)
+        return permutations
+
+    def unobserved_permutations(self, block_size = 2**16):
+        '''
+        PURPOSE
+        Lists the permutations of faces that were never rolled in the most recent play. The permutations are
+        generated lazily, one block of keys at a time, so the full space of permutations is never held in memory.
+
+        INPUTS
+        block_size    optional integer, the number of candidate permutations checked per block.
+
+        OUTPUTS
+        a generator of tuples of faces.
+        '''
+        faces = self.game.faces
+        for block in self._unobserved_permutation_blocks(block_size):
+            yield from zip(*(faces[column].tolist() for column in block.T))
+
+    def _unobserved_permutation_blocks(self, block_size = 2**16):
+        '''
+        PURPOSE
+        Lazily list the permutations of face codes that were never rolled in the most recent play, as blocks of code rows.
+        '''
+        codes = self.game.play_codes()
+        num_faces = len(self.game.faces)
+        num_dice = codes.shape[1]
+        observed_rows = self._reducer("permutation_count").result()[0]
+        if not key_fits(num_faces, num_dice):
+            observed = set(map(tuple, observed_rows.tolist()))
+            for permutation in itertools.product(range(num_faces), repeat = num_dice):
+                if permutation not in observed:
+                    yield np.array([permutation], dtype=np.int64)
+            return
+
+        observed = encode_rows(observed_rows, num_faces)
+        space = key_space(num_faces, num_dice)
+        for start in range(0, space, block_size):
+            candidates = np.arange(start, min(start + block_size, space), dtype=np.int64)
+            missing = candidates[~np.isin(candidates, observed, assume_unique=True)]
+            if len(missing):
+                yield decode_keys(missing, num_faces, num_dice)
+
+    @instrumented("Analyzer.top_permutations", rows = lambda analyzer, result: analyzer.game._play_codes.shape[0])
+    def top_permutations(self, k = 10, capacity = 1024, width = 2**14, depth = 4):
+        '''
+        PURPOSE
+        Finds the most frequent permutations of faces rolled in bounded memory, for games where permutation_count would
+        be too large to hold. The rolls are streamed in chunks through a Space-Saving summary, which keeps the capacity
+        most frequent permutations as candidates, and a Count-Min sketch of depth rows and width columns, which tightens
+        their counts. Memory depends only on capacity, width and depth.
+
+        INPUTS
+        k           optional integer, the number of permutations to report.
+        capacity    optional integer, the number of candidate permutations kept. The count of every permutation is
+                    known to within the number of rolls divided by capacity.
+        width       optional integer, the width of the Count-Min sketch, a power of two.
+        depth       optional integer, the depth of the Count-Min sketch.
+
+        OUTPUTS
+        a dataframe of the k most frequent permutations, most frequent first, with a Counts column holding the estimated
+        count (never below the true count) and a Lower Bound column (never above it). The most times a permutation that
+        is not listed can have been rolled is kept in the dataframe's attrs under "max_unlisted_count".
+        '''
+        return self._top_rolls(False, k, capacity, width, depth, 'permutations')
+
+    @instrumented("Analyzer.top_combinations", rows = lambda analyzer, result: analyzer.game._play_codes.shape[0])
+    def top_combinations(self, k = 10, capacity = 1024, width = 2**14, depth = 4):
+        '''
+        PURPOSE
+        Finds the most frequent combinations of faces rolled in bounded memory, in the same way as top_permutations.
+        Combinations are order-independent.
+
+        INPUTS
+        k           optional integer, the number of combinations to report.
+        capacity    optional integer, the number of candidate combinations kept.
+        width       optional integer, the width of the Count-Min sketch, a power of two.
+        depth       optional integer, the depth of the Count-Min sketch.
+
+        OUTPUTS
+        a dataframe in the same format as top_permutations.
+        '''
+        return self._top_rolls(True, k, capacity, width, depth, 'Combinations')
+
+    def _top_rolls(self, combinations, k, capacity, width, depth, index_name):
+        '''
+        PURPOSE
+        Stream the most recent play through a heavy hitter reducer and return its top rolls as a dataframe.
+        '''
+        codes = self.game.play_codes()
+        reducer = HeavyHitterReducer(len(self.game.faces), codes.shape[1], combinations, capacity, width, depth)
+        for chunk in self.game.play_chunks(REDUCER_CHUNK_ROWS):
+            reducer.update(chunk)
+        return self._sketch_frame(*reducer.result(k), index_name)
+
+    def _sketch_frame(self, rows, counts, lower, max_unlisted, index_name):
+        '''
+        PURPOSE
+        Turn the result of a heavy hitter reducer into a dataframe indexed by tuples of faces.
+        '''
+        frame = self._count_frame(rows, counts, index_name)
+        frame['Lower Bound'] = np.asarray(lower, dtype=np.int64)
+        frame.attrs['max_unlisted_count'] = int(max_unlisted)
+        return frame
+
+    @instrumented("Analyzer.rare_event_probability", rows = lambda analyzer, result: result["rolls"])
+    def rare_event_probability(self, event = "jackpot", confidence = 0.95):
+        '''
+        PURPOSE
+        Estimates the probability of an event for the game's dice from the most recent play, weighting every roll by
+        its likelihood ratio. For a play made with Game.play_weighted the estimate is unbiased for the original dice
+        even though the rolls came from the proposal weights, and for a plain play it is the fraction of rolls with the
+        event. With antithetic sampling the error is computed from the average of each pair. With stratified sampling the
+        usual error formula is used, which overstates the error a little. When no roll had the event the normal interval
+        says nothing, so the standard error is NaN and the upper end is the rule of three bound -log(1 - confidence) / rolls
+        for a plain play, or infinite for a weighted play.
+
+        INPUTS
+        event         optional, "jackpot" or a function that takes the matrix of faces rolled (one row per roll and one
+                      column per die) and returns a boolean array, True for the rolls where the event happened.
+        confidence    optional float, the confidence level of the normal interval around the estimate.
+
+        OUTPUTS
+        a dictionary with the estimate, its standard error, the lower and upper ends of the interval, the number of
+        rolls, the number of rolls with the event (hits) and the effective sample size of the likelihood ratios.
+        '''
+        if not 0 < confidence < 1:
+            raise ValueError("The confidence must be between 0 and 1")
+        codes = self.game.play_codes()
+        likelihood = self.game.play_likelihood()
+        if event == "jackpot":
+            hits = (codes == codes[:, :1]).all(axis=1)
+        elif callable(event):
+            hits = np.asarray(event(self.game.faces[codes]), dtype=bool)
+        else:
+            raise ValueError("The event must be \"jackpot\" or a function of the faces rolled")
+        rolls = len(likelihood)
+        if rolls < 2:
+            raise ValueError("At least two rolls are needed to estimate a probability")
+
+        values = likelihood * hits
+        if self.game._play_sampling == "antithetic":
+            #the two rolls of a pair are correlated, so the pair averages are the independent samples
+            samples = values.reshape(-1, 2).mean(axis=1)
+        else:
+            samples = values
+        estimate = float(values.mean())
+        if not hits.any():
+            std_error, lower = math.nan, 0.0
+            weighted = self.game._play_likelihood is not None
+            upper = math.inf if weighted else -math.log(1 - confidence) / rolls
+        else:
+            std_error = float(samples.std(ddof=1) / math.sqrt(len(samples))) if len(samples) > 1 else math.inf
+            from statistics import NormalDist
+            z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+            lower, upper = max(estimate - z * std_error, 0.0), estimate + z * std_error
+        return {"estimate": estimate, "std_error": std_error, "lower": lower, "upper": upper,
+                "rolls": rolls, "hits": int(hits.sum()),
+                "effective_sample_size": float(likelihood.sum()**2 / (likelihood**2).sum())}
+
+    @instrumented("Analyzer.exact_distribution")
+    def exact_distribution(self, statistic = "jackpot", max_outcomes = 2**22):
+        '''
+        PURPOSE
+        Computes the exact probability of every possible outcome from the weights of the dice, without playing the game.
+        Jackpot probabilities are products of the face chances of each die, permutation probabilities are products over
+        the dice, and combination probabilities use the multinomial formula, or a convolution over the dice when the
+        dice have different weights.
+
+        INPUTS
+        statistic       optional string, one of "jackpot", "combo_count" or "permutation_count".
+        max_outcomes    optional integer, a ValueError is raised instead of listing more outcomes than this.
+
+        OUTPUTS
+        a dataframe with the outcomes as the index, in the same format as the matching method, and a column Probability.
+        '''
+        import pandas as pd
+        probabilities = probability_matrix(self.game.similar_dice)
+        num_dice, num_faces = probabilities.shape
+        if statistic == "jackpot":
+            return pd.DataFrame({'Probability': jackpot_probabilities(probabilities)},
+                                index = pd.Index(self.game.faces, name = 'Faces'))
+        if statistic == "permutation_count":
+            if key_space(num_faces, num_dice) > max_outcomes:
+                raise ValueError("There are more than max_outcomes permutations")
+            rows = decode_keys(np.arange(key_space(num_faces, num_dice)), num_faces, num_dice)
+            distribution = self._count_frame(rows, np.zeros(len(rows)), 'permutations')
+            distribution = distribution.rename(columns = {'Counts': 'Probability'})
+            distribution['Probability'] = permutation_probabilities(probabilities, rows)
+            return distribution
+        if statistic == "combo_count":
+            if math.comb(num_faces + num_dice - 1, num_dice) > max_outcomes:
+                raise ValueError("There are more than max_outcomes combinations")
+            rows = np.array(list(itertools.combinations_with_replacement(range(num_faces), num_dice)), dtype=np.int64)
+            distribution = self._count_frame(rows.reshape(-1, num_dice), np.zeros(len(rows)), 'Combinations')
+            distribution = distribution.rename(columns = {'Counts': 'Probability'})
+            distribution['Probability'] = combination_probabilities(probabilities, rows)
+            return distribution
+        raise ValueError("Entered invalid statistic, must be jackpot, combo_count or permutation_count")
+
+    @instrumented("Analyzer.analyze_stream", rows = lambda analyzer, result: result["rolls"])
+    def analyze_stream(self, stream, statistics = STATISTICS):
+        '''
+        PURPOSE
+        Computes statistics over a stream of face code chunks, such as the chunks from Game.play_stream, without
+        holding the whole play in memory. Each statistic is kept as a running reducer that is updated chunk by chunk.
+        The stream must come from dice with the same faces as the analyzer's game.
+
+        INPUTS
+        stream        an iterable of numpy arrays of face codes, each with one row per roll and one column per die.
+        statistics    optional tuple naming the statistics to compute, any of "jackpot", "face_counts",
+                      "combo_count", "permutation_count", "top_combinations" and "top_permutations". The combination
+                      and permutation counts grow with the number of distinct rolls, so leave them out when that number
+                      is too large and ask for the bounded-memory top_combinations or top_permutations instead.
+
+        OUTPUTS
+        a dictionary with the number of rolls under "rolls" and one entry per statistic. "jackpot" holds the jackpot
+        dataframe by face, "face_counts" a dataframe of how many times each face was rolled over all dice,
+        "combo_count" and "permutation_count" dataframes in the same format as the matching methods, and
+        "top_combinations" and "top_permutations" dataframes of every candidate kept by the sketch, in the same format
+        as the matching methods.
+        '''
+        reducers = make_reducers(statistics, len(self.game.faces), len(self.game.similar_dice))
+        rolls = 0
+        for codes in stream:
+            for reducer in reducers.values():
+                reducer.update(codes)
+            rolls += codes.shape[0]
+        return self._reducer_results(reducers, rolls)
+
+    @instrumented("Analyzer.analyze_archive", rows = lambda analyzer, result: result["rolls"])
+    def analyze_archive(self, path, start = 0, stop = None, statistics = STATISTICS):
+        '''
+        PURPOSE
+        Computes statistics over a range of rolls of a play archive written by Game.save_archive. Only the chunks of the
+        archive that hold the range are decompressed, one at a time, and streamed through analyze_stream.
+
+        INPUTS
+        path          the path of a file written by Game.save_archive. Its faces must match the analyzer's game.
+        start         optional integer, the first roll to analyze, counting from 0.
+        stop          optional integer, one past the last roll to analyze. Defaults to the end of the archive.
+        statistics    optional tuple naming the statistics to compute, as in analyze_stream.
+
+        OUTPUTS
+        a dictionary in the same format as analyze_stream.
+        '''
+        archive = PlayArchive(path)
+        if not np.array_equal(archive.faces, self.game.faces) or archive.num_dice != len(self.game.similar_dice):
+            raise ValueError("The archive must hold rolls of dice like the analyzer's game")
+        return self.analyze_stream(archive.chunks(start, stop), statistics)
+
+    @instrumented("Analyzer.analyze_parallel", rows = lambda analyzer, result: result["rolls"])
+    def analyze_parallel(self, num_of_rolls, workers = None, seed = None, chunk_size = 2**20, statistics = STATISTICS):
+        '''
+        PURPOSE
+        Plays the analyzer's game a set number of times across a pool of processes and computes statistics without
+        saving the rolls. Every worker streams its share of the rolls through its own reducers with an independent
+        random stream spawned from one numpy.random.SeedSequence, and the reducers are merged in worker order,
+        so the result is the same for the same seed and number of workers.
+
+        INPUTS
+        num_of_rolls    an integer to specify how many times the dice should be rolled
+        workers         optional integer, the number of worker processes. Defaults to the number of CPUs.
+        seed            optional integer or numpy.random.SeedSequence. Defaults to fresh entropy.
+        chunk_size      optional integer, the number of rolls each worker holds in memory at a time.
+        statistics      optional tuple naming the statistics to compute, as in analyze_stream.
+
+        OUTPUTS
+        a dictionary in the same format as analyze_stream.
+        '''
+        tables = self.game._stacked_tables()
+        dtype = code_dtype(len(self.game.faces))
+        jobs = [(tables, rolls, seed_seq, dtype, chunk_size, tuple(statistics))
+                for rolls, seed_seq in split_rolls(num_of_rolls, workers, seed)]
+        if len(jobs) == 1:
+            parts = [_analyze_worker(*jobs[0])]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers = len(jobs)) as pool:
+                parts = list(pool.map(_analyze_worker, *zip(*jobs)))
+
+        reducers = parts[0]
+        for part in parts[1:]:
+            for name, reducer in reducers.items():
+                reducer.merge(part[name])
+        return self._reducer_results(reducers, num_of_rolls)
+
+    def _reducer_results(self, reducers, rolls):
+        '''
+        PURPOSE
+        Turn finished reducers into the dictionary of dataframes returned by analyze_stream.
+        '''
+        import pandas as pd
+        results = {"rolls": rolls}
+        for name, reducer in reducers.items():
+            if name == "jackpot":
+                results[name] = self._jackpot_frame(reducer.jackpots)
+            elif name == "face_counts":
+                results[name] = pd.DataFrame({'Counts': reducer.counts}, index = pd.Index(self.game.faces, name = 'Faces'))
+            elif name == "combo_count":
+                results[name] = self._count_frame(*reducer.result(), 'Combinations')
+            elif name == "top_combinations":
+                results[name] = self._sketch_frame(*reducer.result(), 'Combinations')
+            elif name == "top_permutations":
+                results[name] = self._sketch_frame(*reducer.result(), 'permutations')
             else:
-                permutationlist.append(list(df_permutations.loc[i]))
-                df_permutations.loc[i, "Counts"] = 1
-
-        possiblepermutations = list(itertools.product((np.unique(mygameresult.values)).tolist(), repeat = len(mygameresult.columns.tolist())))
-
-        newlist = []
-        for j in possiblepermutations:
-            if list(j) not in permutationlist:
-                newlist.append(list(j))
-
-        df_permutations2 = pd.DataFrame(
-            {
-                'permutations': newlist,
-                'Counts': 0
-            })
-                
-
-        df_permutations_final = pd.concat([df_permutations, df_permutations2], axis=0)
-        df_permutations_final_ = df_permutations_final.set_index(['permutations'])
-        return df_permutations_final_
-                
+                results[name] = self._count_frame(*reducer.result(), 'permutations')
+        return results
+
+    def _count_frame(self, rows, counts, index_name):
+        '''
+        PURPOSE
+        Decode a matrix of face code rows and their counts into a dataframe indexed by tuples of faces.
+        '''
+        import pandas as pd
+        faces = self.game.faces
+        index = pd.Index(list(zip(*(faces[column].tolist() for column in np.asarray(rows).T))),
+                         name = index_name, tupleize_cols = False)
+        return pd.DataFrame({'Counts': np.asarray(counts, dtype=np.int64)}, index = index)
@@ -0,0 +1,228 @@
+import json
+import lzma
+import struct
+import zlib
+
+import numpy as np
+
+try:
+    from .Sampler import code_dtype
+except ImportError:
+    from Sampler import code_dtype
+
+#first bytes of an archive written by write_archive
+_ARCHIVE_MAGIC = b"MCARCH\x01\x00"
+
+#compressors by name, each a (compress, decompress) pair of functions taking bytes and a level
+_COMPRESSORS = {
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+    "none": (lambda data, level: data, lambda data: data),
+}
+
+def code_bits(num_faces):
+    '''
+    PURPOSE
+    Return the number of bits needed to store a face code for a die with num_faces faces, at least one.
+    '''
+    return max(1, (num_faces - 1).bit_length())
+
+def pack_codes(codes, bits):
+    '''
+    PURPOSE
+    Pack face codes into a byte string using bits bits per code, least significant bit first.
+
+    INPUTS
+    codes    a numpy array of non-negative integer face codes, any shape. The codes are packed in row-major order.
+    bits     the number of bits kept from each code, between 1 and 32.
+
+    OUTPUTS
+    a numpy array of uint8 holding ceil(number of codes * bits / 8) bytes.
+    '''
+    values = np.ascontiguousarray(codes, dtype="<u4").reshape(-1)
+    #one row of 32 bits per code, least significant bit first, of which only the first bits columns are kept
+    code_bits_matrix = np.unpackbits(values.view(np.uint8).reshape(-1, 4), axis=1, bitorder="little")[:, :bits]
+    return np.packbits(code_bits_matrix.reshape(-1), bitorder="little")
+
+def unpack_codes(packed, count, bits, dtype):
+    '''
+    PURPOSE
+    Turn bytes made by pack_codes back into face codes.
+
+    INPUTS
+    packed    a numpy array of uint8 from pack_codes.
+    count     the number of codes that were packed.
+    bits      the number of bits per code used by pack_codes.
+    dtype     the integer dtype of the returned codes.
+
+    OUTPUTS
+    a one dimensional numpy array of count face codes.
+    '''
+    code_bits_matrix = np.unpackbits(packed, count=count * bits, bitorder="little").reshape(count, bits)
+    width = 8 * np.dtype(dtype).itemsize
+    padded = np.zeros((count, width), dtype=np.uint8)
+    padded[:, :bits] = code_bits_matrix
+    return np.packbits(padded, axis=1, bitorder="little").view(np.dtype(dtype).newbyteorder("<")).reshape(-1).astype(dtype)
+
+def write_archive(path, chunks, faces, weights, chunk_rows, compression = "zlib", level = 6, seed = None, workers = None,
+                  seek_start = None):
+    '''
+    PURPOSE
+    Write face codes to a bit-packed, compressed archive. Every chunk of chunk_rows rolls is packed to the smallest
+    number of bits per code and compressed on its own, and the byte offset of every chunk is stored in an index at the
+    end of the file, so any range of rolls can be read back by decompressing only the chunks that hold it.
+
+    The file holds, in order: the magic bytes, the length of the JSON header, the JSON header (faces, weights, number
+    of dice, bits per code, chunk size and compression), the compressed chunks, the chunk index as pairs of
+    little-endian uint64 (offset, length), and finally the number of rolls and the offset of the chunk index as two uint64.
+
+    INPUTS
+    path           the path of the file to write.
+    chunks         an iterable of numpy arrays of face codes with one row per roll and one column per die. Every chunk
+                   but the last must have chunk_rows rows.
+    faces          the numpy array of faces the codes point into.
+    weights        a list with the weights of every die.
+    chunk_rows     the number of rolls per compressed chunk.
+    compression    optional string, "zlib" (default), "lzma" or "none".
+    level          optional integer, the compression level passed to zlib or lzma.
+    seed           optional integer, the seed of the play when it is known.
+    workers        optional integer, the number of workers of the play when it is known.
+    seek_start     optional integer, the index of the first roll in its counter-based stream, for seekable plays.
+
+    OUTPUTS
+    the number of rolls written.
+    '''
+    if compression not in _COMPRESSORS:
+        raise ValueError("Entered invalid compression, must be zlib, lzma or none")
+    if chunk_rows < 1:
+        raise ValueError("The chunk_rows must be at least 1")
+    compress = _COMPRESSORS[compression][0]
+    bits = code_bits(len(faces))
+    num_dice = len(weights)
+
+    header = {
+        "version": 1,
+        "faces": faces.tolist(),
+        "faces_dtype": faces.dtype.str,
+        "weights": weights,
+        "num_dice": num_dice,
+        "bits": bits,
+        "chunk_rows": chunk_rows,
+        "compression": compression,
+        "seed": seed,
+        "workers": workers,
+        "seek_start": seek_start,
+    }
+    header = json.dumps(header).encode("utf-8")
+    index = []
+    num_rolls = 0
+    with open(path, "wb") as archive_file:
+        archive_file.write(_ARCHIVE_MAGIC)
+        archive_file.write(struct.pack("<Q", len(header)))
+        archive_file.write(header)
+        for codes in chunks:
+            if codes.shape[1] != num_dice:
+                raise ValueError("Every chunk must have one column per die")
+            if index and index[-1][2] != chunk_rows:
+                raise ValueError("Only the last chunk may have fewer than chunk_rows rows")
+            data = compress(pack_codes(codes, bits).tobytes(), level)
+            index.append((archive_file.tell(), len(data), codes.shape[0]))
+            archive_file.write(data)
+            num_rolls += codes.shape[0]
+        index_offset = archive_file.tell()
+        archive_file.write(np.array([entry[:2] for entry in index], dtype="<u8").reshape(-1, 2).tobytes())
+        archive_file.write(struct.pack("<QQ", num_rolls, index_offset))
+    return num_rolls
+
+
+class PlayArchive:
+    '''
+    The purpose of this file is to read a play archive written by write_archive.
+
+    Only the header and the chunk index are read when the archive is opened. Rolls are read by decompressing the
+    chunks that hold them, so any range of a large archive can be read or streamed without decompressing the rest.
+
+    Summary: This class can read any range of rolls from an archive, stream it in chunks and return the archive's
+    faces and weights.
+    '''
+    def __init__(self, path):
+        '''
+        PURPOSE
+        Open an archive and read its header and chunk index.
+
+        INPUTS
+        path    the path of a file written by write_archive.
+        '''
+        self.path = path
+        with open(path, "rb") as archive_file:
+            if archive_file.read(len(_ARCHIVE_MAGIC)) != _ARCHIVE_MAGIC:
+                raise ValueError("The file is not a Monte Carlo play archive")
+            header_length = struct.unpack("<Q", archive_file.read(8))[0]
+            header = json.loads(archive_file.read(header_length).decode("utf-8"))
+            archive_file.seek(-16, 2)
+            self.num_rolls, index_offset = struct.unpack("<QQ", archive_file.read(16))
+            archive_file.seek(index_offset)
+            num_chunks = -(-self.num_rolls // header["chunk_rows"])
+            self._index = np.frombuffer(archive_file.read(16 * num_chunks), dtype="<u8").reshape(-1, 2)
+
+        self.faces = np.array(header["faces"], dtype=header["faces_dtype"])
+        self.weights = header["weights"]
+        self.num_dice = header["num_dice"]
+        self.bits = header["bits"]
+        self.chunk_rows = header["chunk_rows"]
+        self.compression = header["compression"]
+        self.seed = header["seed"]
+        self.workers = header["workers"]
+        self.seek_start = header.get("seek_start")
+        self.dtype = code_dtype(len(self.faces))
+
+    def _read_chunk(self, archive_file, chunk):
+        '''
+        PURPOSE
+        Decompress and unpack one chunk of the archive.
+        '''
+        offset, length = (int(value) for value in self._index[chunk])
+        archive_file.seek(offset)
+        data = _COMPRESSORS[self.compression][1](archive_file.read(length))
+        rows = min(self.chunk_rows, self.num_rolls - chunk * self.chunk_rows)
+        packed = np.frombuffer(data, dtype=np.uint8)
+        return unpack_codes(packed, rows * self.num_dice, self.bits, self.dtype).reshape(rows, self.num_dice)
+
+    def chunks(self, start = 0, stop = None):
+        '''
+        PURPOSE
+        Stream the face codes of a range of rolls one archive chunk at a time. Only the chunks that overlap the range are
+        decompressed, and the first and last are trimmed to it.
+
+        INPUTS
+        start    optional integer, the first roll, counting from 0.
+        stop     optional integer, one past the last roll. Defaults to the end of the archive.
+
+        OUTPUTS
+        a generator of numpy arrays of face codes, each with one row per roll and one column per die.
+        '''
+        stop = self.num_rolls if stop is None else min(stop, self.num_rolls)
+        if start < 0 or start > stop:
+            raise IndexError("The roll range is outside the archive")
+        with open(self.path, "rb") as archive_file:
+            for chunk in range(start // self.chunk_rows, -(-stop // self.chunk_rows)):
+                first = chunk * self.chunk_rows
+                codes = self._read_chunk(archive_file, chunk)
+                yield codes[max(start - first, 0):stop - first]
+
+    def read(self, start = 0, stop = None):
+        '''
+        PURPOSE
+        Read the face codes of a range of rolls into one array, decompressing only the chunks that hold them.
+
+        INPUTS
+        start    optional integer, the first roll, counting from 0.
+        stop     optional integer, one past the last roll. Defaults to the end of the archive.
+
+        OUTPUTS
+        a numpy array of face codes with one row per roll and one column per die.
+        '''
+        parts = list(self.chunks(start, stop))
+        if not parts:
+            return np.zeros((0, self.num_dice), dtype=self.dtype)
+        return np.concatenate(parts, axis=0)
@@ -0,0 +1,287 @@
+'''
+The purpose of this file is to time the hot paths of the Die, Game and Analyzer classes.
+
+Every benchmark case is run over a sweep of faces x dice x rolls. Like timeit, each case is called as many times as
+needed for one measurement to take at least MIN_SECONDS, and the best time per call over a few repeats, the throughput
+and the peak memory traced by tracemalloc are recorded and written to a JSON file. The results can be compared with a
+stored baseline so that slowdowns are caught. Every run also times a fixed numpy workload, so a baseline recorded on
+a faster or slower machine is scaled to this one, and cases faster than MIN_CASE_SECONDS per call are not compared.
+
+Run from the MonteCarlo folder:
+    python Benchmark.py                                   run the sweep and print the results
+    python Benchmark.py --output results.json             also write the results to a file
+    python Benchmark.py --baseline benchmark_baseline.json
+                                                          compare with a baseline, exits with 1 if a case got slower
+    python Benchmark.py --quick                           run a smaller sweep
+    python Benchmark.py --min-time 0.5                    time each case for at least 0.5 seconds per repeat
+'''
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+try:
+    from .Die import Die
+    from .Game import Game
+    from .Analyzer import Analyzer
+except ImportError:
+    from Die import Die
+    from Game import Game
+    from Analyzer import Analyzer
+
+#faces x dice x rolls swept by default and with --quick, the quick sweep is a part of the full one
+SWEEP = {"faces": [6, 100], "dice": [2, 5], "rolls": [10**4, 10**5]}
+QUICK_SWEEP = {"faces": [6], "dice": [2], "rolls": [10**4]}
+
+#path of the stored baseline, next to this file
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+#least total time of one measurement, fast cases are called many times to reach it
+MIN_SECONDS = 0.2
+
+#cases faster than this per call in both runs are timed but not compared, their times are mostly interpreter overhead
+MIN_CASE_SECONDS = 1e-4
+
+def _make_game(faces, dice, rolls, seed = 0):
+    '''
+    PURPOSE
+    Build a played game of unfair dice for a benchmark case, always with the same weights and rolls.
+    '''
+    rng = np.random.default_rng(seed)
+    dice_list = []
+    for i in range(dice):
+        die = Die(np.arange(faces))
+        die.set_weights(rng.random(faces) + 0.5)
+        dice_list.append(die)
+    game = Game(dice_list)
+    game.play(rolls, rng=seed)
+    return game
+
+def benchmark_cases(faces, dice, rolls):
+    '''
+    PURPOSE
+    List the benchmark cases for one point of the sweep.
+
+    OUTPUTS
+    a list of (case name, number of items processed, setup function, timed function) tuples. The setup function
+    hands fresh state to the timed function before every call, so only the timed function is measured. The played
+    game is built once per case and its caches are dropped by the setup function, so setup stays cheap when a fast
+    case is called many times.
+    '''
+    face_array = np.arange(faces)
+    die = _make_game(faces, 1, 0).similar_dice[0]
+    games = {name: _make_game(faces, dice, rolls) for name in ("play", "wide", "narrow", "analyzer")}
+
+    def fresh_result(game):
+        game._play_frames = {}
+        game._narrow_index_cache = None
+        return game
+
+    return [
+        ("Die.__init__", faces, lambda: face_array, lambda faces_: Die(faces_)),
+        ("Die.roll_the_dice", rolls, lambda: die, lambda die_: die_.roll_the_dice(rolls, rng=1)),
+        ("Game.play", rolls * dice, lambda: games["play"], lambda game: game.play(rolls, rng=1)),
+        ("Game.play_result wide", rolls * dice, lambda: fresh_result(games["wide"]),
+            lambda game: game.play_result("wide")),
+        ("Game.play_result narrow", rolls * dice, lambda: fresh_result(games["narrow"]),
+            lambda game: game.play_result("narrow")),
+        ("Analyzer.jackpot", rolls * dice, lambda: Analyzer(games["analyzer"]), lambda analyzer: analyzer.jackpot()),
+        ("Analyzer.face_counts_per_roll", rolls * dice, lambda: Analyzer(games["analyzer"]),
+            lambda analyzer: analyzer.face_counts_per_roll()),
+        ("Analyzer.combo_count", rolls * dice, lambda: Analyzer(games["analyzer"]),
+            lambda analyzer: analyzer.combo_count()),
+        ("Analyzer.permutation_count", rolls * dice, lambda: Analyzer(games["analyzer"]),
+            lambda analyzer: analyzer.permutation_count()),
+    ]
+
+def _time_calls(setup, timed, number):
+    '''
+    PURPOSE
+    Call a case number times, each with fresh state from setup, and return the total time of the timed calls.
+    '''
+    total = 0.0
+    for i in range(number):
+        state = setup()
+        start = time.perf_counter()
+        timed(state)
+        total += time.perf_counter() - start
+    return total
+
+def time_case(setup, timed, repeat = 3, min_seconds = MIN_SECONDS):
+    '''
+    PURPOSE
+    Find the best time per call of a case, like timeit. The number of calls per measurement goes up in steps of
+    1, 2, 5, 10, 20, 50, ... until one measurement takes at least min_seconds, then repeat measurements are made.
+
+    OUTPUTS
+    the best time per call in seconds.
+    '''
+    number, steps = 1, [2, 2.5, 2]
+    while True:
+        total = _time_calls(setup, timed, number)
+        if total >= min_seconds:
+            break
+        number = int(number * steps[0])
+        steps = steps[1:] + steps[:1]
+    best = total / number
+    for i in range(repeat - 1):
+        best = min(best, _time_calls(setup, timed, number) / number)
+    return best
+
+def calibrate(repeat = 3, min_seconds = MIN_SECONDS):
+    '''
+    PURPOSE
+    Time a fixed workload that stands for the speed of the machine, so results from different machines can be
+    compared. Like the cases, it mixes numpy work (sorting and counting a million random numbers) with plain python
+    work (a loop over a hundred thousand numbers).
+
+    OUTPUTS
+    the best time per call of the workload in seconds.
+    '''
+    numbers = np.random.default_rng(0).random(10**6)
+
+    def workload(values):
+        np.bincount((np.sort(values) * 100).astype(np.intp))
+        return sum(i * i for i in range(10**5))
+
+    return time_case(lambda: numbers, workload, repeat, min_seconds)
+
+def run_case(items, setup, timed, repeat = 3, min_seconds = MIN_SECONDS):
+    '''
+    PURPOSE
+    Time one benchmark case and measure its peak memory.
+
+    INPUTS
+    items          the number of items the case processes, used for the throughput.
+    setup          a function building the state passed to timed.
+    timed          the function being measured.
+    repeat         optional integer, the number of measurements. The best time per call is kept.
+    min_seconds    optional float, the least total time of one measurement.
+
+    OUTPUTS
+    a dictionary with the best time per call in seconds, the throughput in items per second and the peak memory in
+    megabytes.
+    '''
+    best = time_case(setup, timed, repeat, min_seconds)
+
+    #memory is traced in a separate run because tracing slows the code down
+    state = setup()
+    tracemalloc.start()
+    timed(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": best, "throughput": items / best if best > 0 else float("inf"), "peak_mb": peak / 2**20}
+
+def run_benchmarks(sweep = SWEEP, repeat = 3, min_seconds = MIN_SECONDS):
+    '''
+    PURPOSE
+    Run every benchmark case over a sweep of faces x dice x rolls.
+
+    INPUTS
+    sweep          optional dictionary with lists of "faces", "dice" and "rolls" values.
+    repeat         optional integer, the number of measurements per case.
+    min_seconds    optional float, the least total time of one measurement.
+
+    OUTPUTS
+    a dictionary with information about the machine, the time of the calibration workload and a list of results,
+    one per case and sweep point.
+    '''
+    results = []
+    #the machine's speed drifts during a long run, so it is calibrated before every sweep point and the best time kept
+    calibration = calibrate(repeat, min_seconds)
+    for faces, dice, rolls in itertools.product(sweep["faces"], sweep["dice"], sweep["rolls"]):
+        calibration = min(calibration, calibrate(1, min_seconds))
+        for name, items, setup, timed in benchmark_cases(faces, dice, rolls):
+            result = {"case": name, "faces": faces, "dice": dice, "rolls": rolls}
+            result.update(run_case(items, setup, timed, repeat, min_seconds))
+            results.append(result)
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "calibration_seconds": min(calibration, calibrate(1, min_seconds)),
+        "results": results,
+    }
+
+def compare(results, baseline, tolerance = 0.5):
+    '''
+    PURPOSE
+    Compare benchmark results with a baseline.
+
+    INPUTS
+    results      a dictionary returned by run_benchmarks.
+    baseline     a dictionary returned by run_benchmarks for the baseline run.
+    tolerance    optional float, a case is a regression when its time is more than (1 + tolerance) times the baseline time.
+
+    OUTPUTS
+    a list of dictionaries, one per case found in both runs, with the two times, their ratio and a regression flag.
+    The baseline times are scaled by the ratio of the two calibration times when both runs have one. Cases faster
+    than MIN_CASE_SECONDS per call in both runs are never flagged.
+    '''
+    def key(result):
+        return (result["case"], result["faces"], result["dice"], result["rolls"])
+
+    scale = 1.0
+    if results.get("calibration_seconds") and baseline.get("calibration_seconds"):
+        scale = results["calibration_seconds"] / baseline["calibration_seconds"]
+    baseline_times = {key(result): result["seconds"] * scale for result in baseline["results"]}
+    comparisons = []
+    for result in results["results"]:
+        if key(result) not in baseline_times:
+            continue
+        baseline_seconds = baseline_times[key(result)]
+        ratio = result["seconds"] / baseline_seconds
+        measurable = max(result["seconds"], baseline_seconds) >= MIN_CASE_SECONDS
+        comparisons.append({"case": result["case"], "faces": result["faces"], "dice": result["dice"],
+                            "rolls": result["rolls"], "seconds": result["seconds"],
+                            "baseline_seconds": baseline_seconds, "ratio": ratio,
+                            "regression": measurable and ratio > 1 + tolerance})
+    return comparisons
+
+def main(argv = None):
+    '''
+    PURPOSE
+    Command line entry point, see the top of this file for the options.
+    '''
+    parser = argparse.ArgumentParser(description="Benchmark the Monte Carlo Die, Game and Analyzer classes.")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE_PATH,
+                        help="compare with this JSON baseline (defaults to the stored baseline)")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown before a case counts as a regression (0.5 means 50%%)")
+    parser.add_argument("--repeat", type=int, default=3, help="measurements per case, the best is kept")
+    parser.add_argument("--min-time", type=float, default=MIN_SECONDS,
+                        help="least total time in seconds of one measurement, fast cases are called repeatedly")
+    parser.add_argument("--quick", action="store_true", help="run a smaller sweep")
+    args = parser.parse_args(argv)
+    #checked before the sweep runs, an installed copy of the package may not ship the stored baseline
+    if args.baseline and not os.path.isfile(args.baseline):
+        parser.error("no baseline file at {}, record one with --output".format(args.baseline))
+
+    results = run_benchmarks(QUICK_SWEEP if args.quick else SWEEP, args.repeat, args.min_time)
+    for result in results["results"]:
+        print("{case:<30} faces={faces:<4} dice={dice:<2} rolls={rolls:<8} {seconds:10.6f}s "
+              "{throughput:14.0f}/s {peak_mb:9.2f}MB".format(**result))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            comparisons = compare(results, json.load(baseline_file), args.tolerance)
+        regressions = [comparison for comparison in comparisons if comparison["regression"]]
+        for comparison in regressions:
+            print("REGRESSION {case} faces={faces} dice={dice} rolls={rolls}: {seconds:.6f}s vs "
+                  "{baseline_seconds:.6f}s ({ratio:.2f}x)".format(**comparison))
+        print("{} cases compared, {} regressions".format(len(comparisons), len(regressions)))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
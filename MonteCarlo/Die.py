@@ -1,7 +1,11 @@
-import pandas as pd
 import numpy as np
-import random
-import itertools
+
+try:
+    from .Sampler import AliasTable, get_rng, counter_uniforms
+    from .Metrics import instrumented, cache_event
+except ImportError:
+    from Sampler import AliasTable, get_rng, counter_uniforms
+    from Metrics import instrumented, cache_event
 
 class Die: 
     '''
@@ -37,21 +41,18 @@ class Die:
         else:
             raise TypeError("The faces variable must be of type numpy array")    
 
-        #check if the values in the array are distinct, if not raise ValueError
-        value_list = []
-        for i in faces:
-            if i in value_list:
-                raise ValueError("All values in the faces array must be unique")
-            else:
-                value_list.append(i)
-        
-        weights = 1.0
-        df_die = pd.DataFrame(
-                {
-                'faces':faces, 
-                'weights':weights
-                }) 
-        self._df_die = df_die.set_index('faces')
+        #build the face index once, if two faces hash to the same entry they are not distinct and a ValueError is raised
+        self._face_index = {face: i for i, face in enumerate(faces.tolist())}
+        if len(self._face_index) != len(faces):
+            raise ValueError("All values in the faces array must be unique")
+
+        #the weights are stored in a contiguous array, a dataframe is only built when the current state is shown
+        self._weights = np.ones(len(faces), dtype=np.float64)
+        #counts every change to the weights so cached samplers know when to rebuild
+        self.weights_version = 0
+        #alias table used for rolling, built on the first roll and rebuilt only after a weight changes
+        self._alias_table = None
+        self._alias_version = None
     
     #method to change the weight of a single side    
     def change_side_weight(self, face_value, new_weight):
@@ -66,7 +67,8 @@ class Die:
                       to this numeric value.
         '''
         #check to see if the face passed is a valid value 
-        if face_value not in self.faces:
+        face_position = self._face_index.get(face_value)
+        if face_position is None:
             #if not a valid value, raise an IndexError
             raise IndexError("The face value provided is not on this die") 
        
@@ -83,25 +85,122 @@ class Die:
             raise TypeError("The new_weight must be numeric")
 
         #change the weight of the side specified with the new weight
-        self._df_die.loc[face_value, "weights"] = new_weight
+        self._weights[face_position] = new_weight
+        self.weights_version += 1
 
-    def roll_the_dice(self, num_of_rolls = 1):
+    def set_weights(self, weights):
+        '''
+        PURPOSE
+        Change the weights of many faces at once.
+
+        INPUTS
+        weights    either a dictionary from face value to new weight, which changes only the faces given,
+                   or an array-like of numeric weights with one weight per face in the order of the faces array,
+                   which replaces every weight.
+        '''
+        if isinstance(weights, dict):
+            try:
+                positions = [self._face_index[face] for face in weights]
+            except (KeyError, TypeError):
+                raise IndexError("A face value provided is not on this die")
+            new_weights = list(weights.values())
+        else:
+            positions = slice(None)
+            new_weights = weights
+
+        try:
+            new_weights = np.asarray(new_weights, dtype=np.float64)
+        except (ValueError, TypeError):
+            raise TypeError("The new weights must be numeric")
+        if isinstance(positions, slice) and new_weights.shape != self._weights.shape:
+            raise ValueError("There must be one weight for each face")
+
+        self._weights[positions] = new_weights
+        self.weights_version += 1
+
+    def get_weights(self):
+        '''
+        PURPOSE
+        Show the die's weights as a numpy array, in the order of the faces array.
+
+        OUTPUTS
+        a read-only numpy array of float weights. Use change_side_weight or set_weights to change them.
+        '''
+        weights = self._weights.view()
+        weights.flags.writeable = False
+        return weights
+
+    @instrumented("Die.roll_the_dice", rows = lambda die, result: len(result))
+    def roll_the_dice(self, num_of_rolls = 1, output = "faces", rng = None):
         '''
         PURPOSE
         roll the dice one or more times. When the dice is rolled it applies the weight of each weight and chooses a random 
-        sample that is the die roll result. 
+        sample that is the die roll result. All rolls are drawn at once from a NumPy random generator using the die's
+        alias table, so each roll takes constant time however many faces the die has.
     
         INPUTS
         num_of_rolls  the number of times a die should be rolled, defaults to one roll.
+        output        optional string, "faces" (default) returns a numpy array of the faces rolled in their native dtype,
+                      "indices" returns a numpy array of the rolled positions in the faces array, and "strings"
+                      returns a python list of the faces as strings (the original output format).
+        rng           optional numpy.random.Generator or integer seed. Defaults to the module's shared generator.
+
+        OUTPUTS
+        the roll results in the format chosen by output.
+        '''
+        if output not in ("faces", "indices", "strings"):
+            raise ValueError("Entered invalid output format, must be faces, indices or strings")
+        if num_of_rolls < 0:
+            raise ValueError("The num_of_rolls must not be negative")
+        rng = get_rng(rng)
+
+        #draw every roll in a single vectorized pass from the cached alias table
+        return self._format_rolls(self._sampler().draw(num_of_rolls, rng), output)
+
+    @instrumented("Die.roll_range", rows = lambda die, result: len(result))
+    def roll_range(self, start, stop, seed, output = "faces"):
+        '''
+        PURPOSE
+        roll the die from a counter-based random stream keyed by a seed and the index of each roll, returning rolls
+        start to stop. Only the blocks of the stream that hold the range are drawn, so any part of a long series of rolls
+        can be regenerated without the rolls before it. The same seed, range and weights always give the same rolls.
+
+        INPUTS
+        start         the index of the first roll in the stream, counting from 0.
+        stop          one past the index of the last roll.
+        seed          an integer seed, the key of the stream.
+        output        optional string, "faces", "indices" or "strings" as in roll_the_dice.
+
+        OUTPUTS
+        the roll results in the format chosen by output.
+        '''
+        if output not in ("faces", "indices", "strings"):
+            raise ValueError("Entered invalid output format, must be faces, indices or strings")
+        return self._format_rolls(self._sampler().sample(counter_uniforms(seed, start, stop, 1)[:, 0]), output)
+
+    def _format_rolls(self, roll_indices, output):
+        '''
+        PURPOSE
+        Turn rolled face positions into the output format of roll_the_dice.
+        '''
+        if output == "indices":
+            return roll_indices
+        if output == "strings":
+            return [str(face) for face in self.faces[roll_indices]]
+        return self.faces[roll_indices]
+
+    def _sampler(self):
+        '''
+        PURPOSE
+        Return the alias table for the current weights, building it only if the weights changed since the last roll.
         '''
-        dice_results = []
-        for i in range(0,num_of_rolls):
-            #some code to roll the dice
-            roll_result = random.choices(self.faces, weights=self._df_die["weights"])
-            #roll_result = self._df_die.faces.sample(weights=self._df_die.weights).values[0]
-            dice_results.append(str(roll_result[0]))
-        return dice_results 
+        cache_event("Die.alias_table", self._alias_version == self.weights_version)
+        if self._alias_version != self.weights_version:
+            self._alias_table = AliasTable(self._weights)
+            self._alias_version = self.weights_version
+        return self._alias_table
 
+    @instrumented("Die.die_currentstate")
     def die_currentstate(self):
         '''
         PURPOSE
@@ -110,4 +209,5 @@ class Die:
         OUTPUTS
         a dataframe where the faces are the index and there is a column showing the weights for each die face. 
         '''
-        return self._df_die
\ No newline at end of file
+        import pandas as pd
+        return pd.DataFrame({'weights': self._weights.copy()}, index = pd.Index(self.faces, name = 'faces'))
\ No newline at end of file
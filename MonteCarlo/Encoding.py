@@ -0,0 +1,142 @@
+import numpy as np
+
+#largest key that still fits in a signed 64 bit integer
+MAX_KEY = 2**63 - 1
+
+#key spaces up to this size are counted with bincount instead of sorting
+BINCOUNT_LIMIT = 2**18
+
+def key_space(num_faces, num_dice):
+    '''
+    PURPOSE
+    Return the number of distinct permutations of num_dice dice with num_faces faces, as an exact python integer.
+    '''
+    return num_faces ** num_dice
+
+def key_fits(num_faces, num_dice):
+    '''
+    PURPOSE
+    Check if every permutation of num_dice dice with num_faces faces can be encoded as one int64 key.
+    '''
+    return key_space(num_faces, num_dice) - 1 <= MAX_KEY
+
+def encode_rows(codes, num_faces):
+    '''
+    PURPOSE
+    Encode each row of a face code matrix as one integer, reading the row as a number written in base num_faces
+    (a mixed-radix encoding). The first die is the most significant digit, so the keys sort in the same order as the rows.
+
+    INPUTS
+    codes        a numpy array of face codes with one row per roll and one column per die.
+    num_faces    the number of faces on the dice.
+
+    OUTPUTS
+    a numpy array of int64 keys, one per roll.
+    '''
+    keys = np.zeros(codes.shape[0], dtype=np.int64)
+    for die in range(codes.shape[1]):
+        keys *= num_faces
+        keys += codes[:, die]
+    return keys
+
+def decode_keys(keys, num_faces, num_dice):
+    '''
+    PURPOSE
+    Turn keys made by encode_rows back into a face code matrix.
+
+    OUTPUTS
+    a numpy array of face codes with one row per key and num_dice columns.
+    '''
+    keys = np.array(keys, dtype=np.int64)
+    rows = np.empty((len(keys), num_dice), dtype=np.int64)
+    for die in range(num_dice - 1, -1, -1):
+        keys, rows[:, die] = np.divmod(keys, num_faces)
+    return rows
+
+def count_keys(keys, space):
+    '''
+    PURPOSE
+    Count the distinct keys in an array of keys. Small key spaces are counted with bincount,
+    larger ones with a sort based np.unique.
+
+    INPUTS
+    keys     a numpy array of non-negative int64 keys.
+    space    the number of possible keys.
+
+    OUTPUTS
+    two numpy arrays, the sorted distinct keys and their counts.
+    '''
+    if space <= BINCOUNT_LIMIT:
+        counts = np.bincount(keys, minlength=space)
+        observed = np.flatnonzero(counts)
+        return observed.astype(np.int64), counts[observed]
+    return np.unique(keys, return_counts=True)
+
+def signature_space(num_faces, num_dice):
+    '''
+    PURPOSE
+    Return the size of the key space used for combination signatures, as an exact python integer.
+    A signature stores how many dice show each face, one base (num_dice + 1) digit per face.
+    '''
+    return (num_dice + 1) ** num_faces
+
+def signature_fits(num_faces, num_dice):
+    '''
+    PURPOSE
+    Check if every combination of num_dice dice with num_faces faces can be encoded as one int64 signature key.
+    '''
+    return signature_space(num_faces, num_dice) - 1 <= MAX_KEY
+
+def encode_signatures(codes, num_faces):
+    '''
+    PURPOSE
+    Encode each row of a face code matrix as the integer key of its face-count vector (its multiset signature).
+    Digit f of the key, in base (number of dice + 1), is how many dice show face f, so rows holding the same faces
+    in any order get the same key. The key is built by adding (number of dice + 1) ** code for each die,
+    which never carries because no face can be shown by more dice than there are.
+
+    INPUTS
+    codes        a numpy array of face codes with one row per roll and one column per die.
+    num_faces    the number of faces on the dice.
+
+    OUTPUTS
+    a numpy array of int64 keys, one per roll.
+    '''
+    powers = (codes.shape[1] + 1) ** np.arange(num_faces, dtype=np.int64)
+    keys = np.zeros(codes.shape[0], dtype=np.int64)
+    for die in range(codes.shape[1]):
+        keys += powers[codes[:, die]]
+    return keys
+
+def decode_signatures(keys, num_faces, num_dice):
+    '''
+    PURPOSE
+    Turn keys made by encode_signatures back into combinations.
+
+    OUTPUTS
+    a numpy array with one row per key holding the face codes of the combination in ascending order.
+    '''
+    keys = np.array(keys, dtype=np.int64)
+    face_counts = np.empty((len(keys), num_faces), dtype=np.int64)
+    for face in range(num_faces):
+        keys, face_counts[:, face] = np.divmod(keys, num_dice + 1)
+    all_faces = np.tile(np.arange(num_faces), len(face_counts))
+    return np.repeat(all_faces, face_counts.ravel()).reshape(len(face_counts), num_dice)
+
+def merge_counts(keys, counts, other_keys, other_counts):
+    '''
+    PURPOSE
+    Add two sets of sorted distinct keys and their counts together.
+
+    OUTPUTS
+    two numpy arrays, the sorted distinct keys of both sets and their summed counts.
+    '''
+    all_keys = np.concatenate([keys, other_keys])
+    all_counts = np.concatenate([counts, other_counts])
+    if len(all_keys) == 0:
+        return all_keys, all_counts
+    order = np.argsort(all_keys, kind="stable")
+    all_keys = all_keys[order]
+    all_counts = all_counts[order]
+    starts = np.flatnonzero(np.r_[True, all_keys[1:] != all_keys[:-1]])
+    return all_keys[starts], np.add.reduceat(all_counts, starts)
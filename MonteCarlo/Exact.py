@@ -0,0 +1,193 @@
+import numpy as np
+
+try:
+    from .Encoding import signature_fits, encode_signatures
+except ImportError:
+    from Encoding import signature_fits, encode_signatures
+
+#the most face codes handled at once when computing likelihood ratios
+CHUNK_DRAWS = 2**20
+
+def probability_matrix(dice):
+    '''
+    PURPOSE
+    Stack the normalized weights of similar dice into one probability matrix.
+
+    INPUTS
+    dice    a list of Die objects with the same faces.
+
+    OUTPUTS
+    a numpy array with one row per die and one column per face, each row sums to one.
+    '''
+    weights = np.vstack([die.get_weights() for die in dice])
+    totals = weights.sum(axis=1, keepdims=True)
+    if (totals <= 0).any():
+        raise ValueError("Every die needs at least one positive weight")
+    return weights / totals
+
+def jackpot_probabilities(probabilities):
+    '''
+    PURPOSE
+    Computes the exact probability of a jackpot on each face, the product over the dice of the chance of that face.
+
+    INPUTS
+    probabilities    a probability matrix with one row per die and one column per face.
+
+    OUTPUTS
+    a numpy array with the jackpot probability of each face.
+    '''
+    return probabilities.prod(axis=0)
+
+def permutation_probabilities(probabilities, rows):
+    '''
+    PURPOSE
+    Computes the exact probability of each permutation, the product over the dice of the chance of the face each die shows.
+
+    INPUTS
+    probabilities    a probability matrix with one row per die and one column per face.
+    rows             a numpy array of face codes with one row per permutation and one column per die.
+
+    OUTPUTS
+    a numpy array with the probability of each row.
+    '''
+    rows = np.asarray(rows, dtype=np.intp).reshape(-1, probabilities.shape[0])
+    return probabilities[np.arange(probabilities.shape[0]), rows].prod(axis=1)
+
+def combination_probabilities(probabilities, rows):
+    '''
+    PURPOSE
+    Computes the exact probability of each combination. When every die has the same weights the multinomial formula
+    is used. Otherwise the distribution of face-count vectors is built by convolving the dice one at a time, which
+    needs the face-count keys to fit in an int64.
+
+    INPUTS
+    probabilities    a probability matrix with one row per die and one column per face.
+    rows             a numpy array of face codes with one row per combination and one column per die.
+
+    OUTPUTS
+    a numpy array with the probability of each row.
+    '''
+    num_dice, num_faces = probabilities.shape
+    rows = np.asarray(rows, dtype=np.intp).reshape(-1, num_dice)
+    face_counts = np.zeros((len(rows), num_faces), dtype=np.int64)
+    for die in range(num_dice):
+        face_counts[np.arange(len(rows)), rows[:, die]] += 1
+
+    if (probabilities == probabilities[0]).all():
+        #multinomial formula: dice! / (count_1! ... count_k!) * p_1 ** count_1 ... p_k ** count_k
+        log_factorials = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, num_dice + 1)))])
+        with np.errstate(divide="ignore"):
+            log_p = np.log(probabilities[0])
+        #faces not rolled add nothing, so zero-weight faces only multiply log(0) when they are rolled
+        log_terms = face_counts * np.where(face_counts > 0, log_p, 0.0)
+        return np.exp(log_factorials[num_dice] - log_factorials[face_counts].sum(axis=1) + log_terms.sum(axis=1))
+
+    if not signature_fits(num_faces, num_dice):
+        raise ValueError("There are too many faces and dice to compute exact combination probabilities for different dice")
+    #convolve the dice one at a time over the encoded face-count vectors
+    powers = (num_dice + 1) ** np.arange(num_faces, dtype=np.int64)
+    keys = np.zeros(1, dtype=np.int64)
+    chances = np.ones(1)
+    for die in range(num_dice):
+        keys, inverse = np.unique((keys[:, None] + powers).ravel(), return_inverse=True)
+        chances = np.bincount(inverse.ravel(), weights=(chances[:, None] * probabilities[die]).ravel())
+
+    row_keys = encode_signatures(rows, num_faces)
+    positions = np.minimum(np.searchsorted(keys, row_keys), len(keys) - 1)
+    return np.where(keys[positions] == row_keys, chances[positions], 0.0)
+
+def jackpot_proposal(probabilities, defensive = 0.1):
+    '''
+    PURPOSE
+    Computes a mixture proposal for importance sampling of jackpots. There is one component per face f that can make
+    a jackpot, in which every die is tilted toward f so that all dice land on f at least half of the time, and the
+    other faces keep their relative weights. Component f is picked in proportion to the chance of a jackpot on f, so
+    the likelihood ratio of a jackpot roll is nearly the same for every face. A defensive component with the original
+    weights keeps every roll possible and caps every likelihood ratio at 1 / defensive. Only the tilt of each die
+    toward each face is kept, never the weights of every component, so memory grows with dice x faces.
+
+    INPUTS
+    probabilities    a probability matrix with one row per die and one column per face.
+    defensive        optional float in (0, 1], the share of the rolls made with the original weights.
+
+    OUTPUTS
+    two numpy arrays: the mixture weights, summing to one, with the weight of the original weights first and then one
+    weight per face (zero for a face that cannot make a jackpot), and the tilts, a matrix of the same shape as
+    probabilities with the chance that die d lands on face f in the component of face f.
+    '''
+    if not 0 < defensive <= 1:
+        raise ValueError("The defensive share must be in (0, 1]")
+    num_dice, num_faces = probabilities.shape
+    jackpots = jackpot_probabilities(probabilities)
+    mixture = np.zeros(num_faces + 1)
+    if jackpots.sum() == 0 or defensive == 1:
+        #no face can make a jackpot, keep the original weights
+        mixture[0] = 1
+        return mixture, probabilities.copy()
+    mixture[0] = defensive
+    mixture[1:] = (1 - defensive) * jackpots / jackpots.sum()
+    tilts = np.where(jackpots > 0, np.maximum(probabilities, 0.5 ** (1 / num_dice)), probabilities)
+    return mixture, tilts
+
+def likelihood_ratios(probabilities, proposal, codes, mixture = None, tilts = None, chunk_rows = None):
+    '''
+    PURPOSE
+    Computes the likelihood ratio of each roll, the chance of the roll under the dice weights divided by its chance
+    under the proposal weights it was rolled from. With a mixture the rolls come from the proposal or from one of its
+    tilted versions (see jackpot_proposal), and the chance of a roll is the mixture density. The density of the
+    component of face f relative to the proposal only depends on the dice that show f, so it is computed from the
+    distinct faces of each roll and memory grows with rolls x dice, not with the number of components.
+
+    INPUTS
+    probabilities    a probability matrix with one row per die and one column per face.
+    proposal         a probability matrix of the same shape that the rolls were drawn from.
+    codes            a numpy array of face codes with one row per roll and one column per die.
+    mixture          optional array with the weight of the proposal and then of the component of every face.
+    tilts            optional matrix with the chance that die d lands on face f in the component of face f,
+                     needed with a mixture.
+    chunk_rows       optional integer, the rolls are handled in blocks of this size to keep temporary arrays small.
+                     Defaults to CHUNK_DRAWS face codes per block.
+
+    OUTPUTS
+    a numpy array of float ratios, one per roll.
+    '''
+    num_dice, num_faces = probabilities.shape
+    if ((proposal <= 0) & (probabilities > 0)).any():
+        raise ValueError("The proposal weights must be positive wherever the die weights are positive")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ratio = np.where(probabilities > 0, np.log(probabilities) - np.log(proposal), -np.inf).ravel()
+    if mixture is not None:
+        mixture = np.asarray(mixture, dtype=np.float64)
+        if len(mixture) != num_faces + 1:
+            raise ValueError("The mixture needs one weight for the proposal and one per face")
+        if ((tilts >= 1) & (proposal < 1)).any():
+            raise ValueError("A die can only be tilted all the way to a face it always lands on")
+        used = mixture[1:] > 0
+        #component f relative to the proposal: a die on f gains tilt / proposal, a die off f keeps (1 - tilt) / (1 - proposal)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            on_face = np.where(used, np.log(tilts) - np.log(proposal), 0.0)
+            off_face = np.where(used & (proposal < 1), np.log1p(-tilts) - np.log1p(-proposal), 0.0)
+            log_weights = np.where(used, np.log(mixture[1:]), -np.inf) + off_face.sum(axis=0)
+        boosts = (on_face - off_face).ravel()
+        base_density = mixture[0] + np.exp(log_weights).sum()
+    if chunk_rows is None:
+        chunk_rows = max(1, CHUNK_DRAWS // max(num_dice, 1))
+    ratios = np.empty(codes.shape[0])
+    for start in range(0, codes.shape[0], chunk_rows):
+        rows = codes[start:start + chunk_rows].astype(np.intp)
+        flat = rows + np.arange(num_dice, dtype=np.intp) * num_faces
+        chunk = np.exp(log_ratio[flat].sum(axis=1))
+        if mixture is not None:
+            #sum the boosts of the dice that show the same face, once per distinct face of a roll
+            order = np.argsort(rows, axis=1, kind="stable")
+            faces = np.take_along_axis(rows, order, axis=1)
+            first = np.ones(faces.shape, dtype=bool)
+            first[:, 1:] = faces[:, 1:] != faces[:, :-1]
+            firsts = np.flatnonzero(first)
+            sums = np.add.reduceat(np.take_along_axis(boosts[flat], order, axis=1).ravel(), firsts)
+            log_base = log_weights[faces.ravel()[firsts]]
+            with np.errstate(over="ignore", invalid="ignore"):
+                terms = np.exp(log_base + sums) - np.exp(log_base)
+            chunk /= base_density + np.bincount(firsts // num_dice, weights=terms, minlength=len(rows))
+        ratios[start:start + chunk_rows] = chunk
+    return ratios
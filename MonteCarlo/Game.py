@@ -1,9 +1,89 @@
-import pandas as pd
 import numpy as np
-import random
-import itertools
+import os
+import json
+import math
+import struct
 
-from Die import Die
+try:
+    from .Die import Die
+    from .Sampler import StackedAliasTable, code_dtype, get_rng, stratified_uniforms, antithetic_uniforms
+    from .Sampler import counter_uniforms, sample_tilted
+    from .Exact import probability_matrix, jackpot_proposal, likelihood_ratios
+    from .Reducers import JackpotReducer, FaceCountReducer
+    from .Metrics import instrumented, cache_event
+    from .Archive import write_archive, PlayArchive
+except ImportError:
+    from Die import Die
+    from Sampler import StackedAliasTable, code_dtype, get_rng, stratified_uniforms, antithetic_uniforms
+    from Sampler import counter_uniforms, sample_tilted
+    from Exact import probability_matrix, jackpot_proposal, likelihood_ratios
+    from Reducers import JackpotReducer, FaceCountReducer
+    from Metrics import instrumented, cache_event
+    from Archive import write_archive, PlayArchive
+
+#first bytes of a play file written by Game.save_play
+_PLAY_MAGIC = b"MCPLAY\x01\x00"
+
+def split_rolls(num_of_rolls, workers = None, seed = None):
+    '''
+    PURPOSE
+    Split a number of rolls between workers and spawn an independent seed for each worker.
+
+    INPUTS
+    num_of_rolls    the total number of rolls.
+    workers         optional integer, the number of workers. Defaults to the number of CPUs.
+    seed            optional integer or numpy.random.SeedSequence. Defaults to fresh entropy.
+
+    OUTPUTS
+    a list with one (number of rolls, numpy.random.SeedSequence) pair per worker.
+    The first num_of_rolls % workers workers get one extra roll.
+    '''
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("The number of workers must be at least 1")
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    share, extra = divmod(num_of_rolls, workers)
+    return [(share + (worker < extra), seed_seq) for worker, seed_seq in enumerate(seed.spawn(workers))]
+
+def _wilson_summary(successes, trials, z):
+    '''
+    PURPOSE
+    Compute the Wilson score interval of a proportion and its relative error, the half-width over the center.
+    '''
+    estimate = successes / trials
+    denominator = 1 + z**2 / trials
+    center = (estimate + z**2 / (2 * trials)) / denominator
+    half_width = z * math.sqrt(estimate * (1 - estimate) / trials + z**2 / (4 * trials**2)) / denominator
+    relative_error = half_width / center if center > 0 else math.inf
+    return {"estimate": estimate, "lower": center - half_width, "upper": center + half_width,
+            "relative_error": relative_error}
+
+def _categorical_code_dtype(size):
+    '''
+    PURPOSE
+    Return the integer dtype pandas stores categorical and multiindex codes in for size categories, so code arrays built
+    in that dtype are used by pandas without a copy.
+    '''
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+def _play_worker(tables, num_of_rolls, seed_seq, dtype):
+    '''
+    PURPOSE
+    Roll a stacked alias table in a worker process and return the face codes.
+    '''
+    return tables.draw(num_of_rolls, np.random.default_rng(seed_seq)).astype(dtype)
+
+def _seek_worker(tables, seed, start, stop, dtype):
+    '''
+    PURPOSE
+    Roll a range of a seekable play from a stacked alias table in a worker process and return the face codes.
+    '''
+    return tables.sample(counter_uniforms(seed, start, stop, tables.num_dice)).astype(dtype)
 
 class Game: 
     '''
@@ -22,37 +102,497 @@ class Game:
         INPUTS
         similar_dice       a list of already instantiated similar die. 
                            Similar die means that the number and values of the faces are the same,
-                           weights can have different values. 
+                           weights can have different values. Raises a ValueError if the faces differ.
         '''
         self.similar_dice = similar_dice
+        for die in self.similar_dice[1:]:
+            if not np.array_equal(die.faces, self.similar_dice[0].faces):
+                raise ValueError("All dice in a game must have the same faces")
+        #face lookup table shared by every die, a face code is a position in this array
+        self.faces = self.similar_dice[0].faces
+        self._play_codes = None
+        self._play_frames = {}
+        #categorical faces dtype and last narrow index, both built the first time a play dataframe is asked for
+        self._faces_dtype = None
+        self._narrow_index_cache = None
+        self._tables = None
+        self._tables_versions = None
+        #seed and number of workers of the most recent play, when they are known
+        self._play_seed = None
+        self._play_workers = None
+        #likelihood ratio of every roll and the sampling used, for plays made with play_weighted
+        self._play_likelihood = None
+        self._play_sampling = "random"
+        #index of the first roll of a seekable play in its counter-based stream, None for other plays
+        self._play_seek_start = None
+        #counts the plays, goes up with every new play but not when rolls are appended to the current one
+        self.generation = 0
 
-    def play(self, num_of_rolls):
+    @instrumented("Game.play", rows = lambda game, result: game._play_codes.shape[0])
+    def play(self, num_of_rolls, rng = None, append = False):
         '''
         PURPOSE
         roll the dice a set number of times, privately saves a dataset with the game result.  
+        The alias tables of all dice are stacked into one matrix and every die is rolled for every roll
+        in a single vectorized draw. The result is saved as a matrix of integer face codes.
+
+        INPUTS
+        num_of_rolls        an integer to specify how many times the dice should be rolled
+        rng                 optional numpy.random.Generator or integer seed. Defaults to the shared generator.
+        append              optional boolean, when True the new rolls are added after the rolls of the current play
+                            instead of replacing them. The play keeps its generation, so an Analyzer only counts the
+                            new rolls.
+        '''
+        if num_of_rolls < 0:
+            raise ValueError("The num_of_rolls must not be negative")
+        append = append and self._play_codes is not None
+        if append and self._play_likelihood is not None:
+            raise ValueError("Rolls cannot be appended to a play made with play_weighted")
+        tables = self._stacked_tables()
+
+        #one row per roll, one column per die, each cell is the position of the rolled face in self.faces
+        codes = tables.draw(num_of_rolls, get_rng(rng)).astype(code_dtype(len(self.faces)))
+        if append:
+            self._play_codes = np.concatenate([self._play_codes, codes], axis=0)
+            self._play_frames = {}
+            self._play_seed = None
+            self._play_workers = None
+            self._play_seek_start = None
+            return
+        self._store_play(codes, seed = int(rng) if isinstance(rng, (int, np.integer)) else None)
+
+    def _store_play(self, codes, seed = None, workers = None, likelihood = None, sampling = "random", seek_start = None):
+        '''
+        PURPOSE
+        Save the face codes of a new play with what is known about how it was made, and start a new generation.
+        '''
+        self._play_codes = codes
+        #dataframes of the previous play are dropped and only built again when asked for
+        self._play_frames = {}
+        self._play_seed = seed
+        self._play_workers = workers
+        self._play_likelihood = likelihood
+        self._play_sampling = sampling
+        self._play_seek_start = seek_start
+        self.generation += 1
+
+    def _stacked_tables(self):
+        '''
+        PURPOSE
+        Return the stacked alias tables of the dice, rebuilding them only when the weights of a die changed.
+        '''
+        versions = [die.weights_version for die in self.similar_dice]
+        cache_event("Game.stacked_tables", self._tables is not None and versions == self._tables_versions)
+        if self._tables is None or versions != self._tables_versions:
+            self._tables = StackedAliasTable([die._sampler() for die in self.similar_dice])
+            self._tables_versions = versions
+        return self._tables
+
+    def play_stream(self, num_of_rolls, chunk_size = 2**20, rng = None):
+        '''
+        PURPOSE
+        roll the dice a set number of times without saving the result, handing the rolls out in fixed-size chunks.
+        Only one chunk is held in memory at a time, so plays larger than memory can be analyzed with
+        Analyzer.analyze_stream.
+
+        INPUTS
+        num_of_rolls        an integer to specify how many times the dice should be rolled
+        chunk_size          optional integer, the number of rolls in each chunk. The last chunk may be smaller.
+        rng                 optional numpy.random.Generator or integer seed. Defaults to the shared generator.
+
+        OUTPUTS
+        a generator of numpy arrays of face codes, each with one row per roll and one column per die.
+        '''
+        if num_of_rolls < 0:
+            raise ValueError("The num_of_rolls must not be negative")
+        if chunk_size < 1:
+            raise ValueError("The chunk_size must be at least 1")
+        tables = self._stacked_tables()
+        yield from tables.stream(num_of_rolls, chunk_size, get_rng(rng), code_dtype(len(self.faces)))
+
+    @instrumented("Game.play_parallel", rows = lambda game, result: game._play_codes.shape[0])
+    def play_parallel(self, num_of_rolls, workers = None, seed = None, seekable = False):
+        '''
+        PURPOSE
+        roll the dice a set number of times across a pool of processes, privately saves a dataset with the game result.
+        The rolls are split as evenly as possible between the workers and every worker rolls with its own independent
+        stream spawned from one numpy.random.SeedSequence. The chunks are put back together in worker order, so the
+        result is the same for the same seed and number of workers.
+
+        INPUTS
+        num_of_rolls        an integer to specify how many times the dice should be rolled
+        workers             optional integer, the number of worker processes. Defaults to the number of CPUs.
+        seed                optional integer or numpy.random.SeedSequence. Defaults to fresh entropy.
+        seekable            optional boolean, when True every worker rolls its range of a seekable play (see
+                            play_seekable) instead of its own stream, so the result is the same as play_seekable with
+                            the same integer seed, whatever the number of workers.
+        '''
+        if num_of_rolls < 0:
+            raise ValueError("The num_of_rolls must not be negative")
+        if seekable:
+            return self._play_seekable_parallel(num_of_rolls, workers, seed)
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        tables = self._stacked_tables()
+        jobs = [(tables, rolls, seed_seq, code_dtype(len(self.faces)))
+                for rolls, seed_seq in split_rolls(num_of_rolls, workers, seed)]
+        if len(jobs) == 1:
+            chunks = [_play_worker(*jobs[0])]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers = len(jobs)) as pool:
+                chunks = list(pool.map(_play_worker, *zip(*jobs)))
+
+        self._store_play(np.concatenate(chunks, axis=0), seed = int(seed.entropy) if not seed.spawn_key else None,
+                         workers = len(jobs))
+
+    def _play_seekable_parallel(self, num_of_rolls, workers, seed):
+        '''
+        PURPOSE
+        Roll a seekable play across a pool of processes, each worker rolling one contiguous range of rolls.
+        '''
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy)
+        if not isinstance(seed, (int, np.integer)):
+            raise TypeError("A seekable play needs an integer seed")
+        tables = self._stacked_tables()
+        dtype = code_dtype(len(self.faces))
+        shares = [rolls for rolls, seed_seq in split_rolls(num_of_rolls, workers)]
+        stops = np.cumsum(shares).tolist()
+        jobs = [(tables, int(seed), stop - rolls, stop, dtype) for rolls, stop in zip(shares, stops)]
+        if len(jobs) == 1:
+            chunks = [_seek_worker(*jobs[0])]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers = len(jobs)) as pool:
+                chunks = list(pool.map(_seek_worker, *zip(*jobs)))
+        self._store_play(np.concatenate(chunks, axis=0), seed = int(seed), workers = len(jobs), seek_start = 0)
+
+    @instrumented("Game.play_seekable", rows = lambda game, result: game._play_codes.shape[0])
+    def play_seekable(self, num_of_rolls, seed, start = 0):
+        '''
+        PURPOSE
+        roll the dice a set number of times from a counter-based random stream, privately saves a dataset with the game
+        result. The stream is keyed by the seed and the index of each roll, so roll i is the same whichever rolls are made
+        before it. A play can start at any roll of the stream, and roll_range can regenerate any part of it later
+        without it being stored.
+
+        INPUTS
+        num_of_rolls        an integer to specify how many times the dice should be rolled
+        seed                an integer seed, the key of the stream.
+        start               optional integer, the index in the stream of the first roll of the play.
+        '''
+        if num_of_rolls < 0:
+            raise ValueError("The num_of_rolls must not be negative")
+        if not isinstance(seed, (int, np.integer)):
+            raise TypeError("A seekable play needs an integer seed")
+        if not isinstance(start, (int, np.integer)):
+            raise TypeError("The start of a seekable play must be an integer")
+        if start < 0:
+            raise ValueError("The start of a seekable play must not be negative")
+        codes = self.roll_range(start, start + num_of_rolls, seed)
+        self._store_play(codes, seed = int(seed), seek_start = int(start))
+
+    def roll_range(self, start, stop, seed = None):
+        '''
+        PURPOSE
+        Regenerate rolls start to stop of a seekable play without saving them. Only the blocks of the stream that hold
+        the range are drawn, so roll 900,000,000 costs the same as roll 0. The rolls match the play as long as the
+        dice weights have not changed since it was made.
+
+        INPUTS
+        start               the index of the first roll in the stream, counting from 0.
+        stop                one past the index of the last roll.
+        seed                optional integer seed of the stream. Defaults to the seed of the most recent play when it
+                            was made with play_seekable.
+
+        OUTPUTS
+        a numpy array of face codes with one row per roll and one column per die.
+        '''
+        if seed is None:
+            if self._play_seek_start is None:
+                raise ValueError("Give a seed, the most recent play was not made with play_seekable")
+            seed = self._play_seed
+        return _seek_worker(self._stacked_tables(), int(seed), start, stop, code_dtype(len(self.faces)))
+
+    @instrumented("Game.play_adaptive", rows = lambda game, result: result["rolls"])
+    def play_adaptive(self, statistic = "jackpot", rel_error = 0.05, confidence = 0.95, batch_size = 10000,
+                      max_rolls = 10**7, rng = None):
+        '''
+        PURPOSE
+        roll the dice in batches until a chosen statistic is known to a target precision, privately saves a dataset
+        with every roll made. After each batch a Wilson score confidence interval is computed for the statistic and
+        the rolling stops once the half-width of the interval divided by the estimate is at most rel_error,
+        or once max_rolls rolls have been made.
+
+        INPUTS
+        statistic           optional, "jackpot" for the chance that a roll is a jackpot, or a face value for the chance
+                            that a single die shows that face.
+        rel_error           optional float, the target relative error of the estimate.
+        confidence          optional float, the confidence level of the interval.
+        batch_size          optional integer, the number of rolls between checks.
+        max_rolls           optional integer, the most rolls that will be made.
+        rng                 optional numpy.random.Generator or integer seed. Defaults to the shared generator.
+
+        OUTPUTS
+        a dictionary with the estimate, the lower and upper ends of the interval, the relative error reached,
+        the number of rolls made and whether the target was reached (converged).
+        '''
+        if not 0 < confidence < 1:
+            raise ValueError("The confidence must be between 0 and 1")
+        if rel_error <= 0:
+            raise ValueError("The rel_error must be positive")
+        if batch_size < 1:
+            raise ValueError("The batch_size must be at least 1")
+        if statistic == "jackpot":
+            reducer = JackpotReducer(len(self.faces))
+        else:
+            face_position = self.similar_dice[0]._face_index.get(statistic)
+            if face_position is None:
+                raise IndexError("The face value provided is not on these dice")
+            reducer = FaceCountReducer(len(self.faces))
+
+        from statistics import NormalDist
+        z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+        chunks = []
+        summary = None
+        for codes in self.play_stream(max_rolls, batch_size, rng):
+            chunks.append(codes)
+            reducer.update(codes)
+            if statistic == "jackpot":
+                successes, trials = reducer.jackpots.sum(), reducer.rolls
+            else:
+                successes, trials = reducer.counts[face_position], reducer.rolls * codes.shape[1]
+            summary = _wilson_summary(int(successes), int(trials), z)
+            summary["rolls"] = reducer.rolls
+            summary["converged"] = summary["relative_error"] <= rel_error
+            if summary["converged"]:
+                break
+
+        if summary is None:
+            raise ValueError("The max_rolls must be at least 1")
+        self._store_play(np.concatenate(chunks, axis=0), seed = int(rng) if isinstance(rng, (int, np.integer)) else None)
+        summary["statistic"] = statistic
+        return summary
+
+    @instrumented("Game.play_weighted", rows = lambda game, result: game._play_codes.shape[0])
+    def play_weighted(self, num_of_rolls, proposal = None, sampling = "random", rng = None):
+        '''
+        PURPOSE
+        roll the dice a set number of times with importance sampling, privately saves a dataset with the game result and
+        the likelihood ratio of every roll. The dice are rolled from tilted proposal weights instead of their own weights,
+        so rare results such as jackpots come up far more often, and each roll carries the ratio of its chance under the
+        dice weights to its chance under the proposal. Analyzer.rare_event_probability uses the ratios to give unbiased
+        estimates for the original dice.
 
         INPUTS
         num_of_rolls        an integer to specify how many times the dice should be rolled
+        proposal            optional array of non-negative weights, one row per die (or a single row shared by every die)
+                            and one column per face. Every face a die can roll must keep a positive weight.
+                            Defaults to a mixture with one component per face in which every die is tilted toward
+                            that face, so about half of the rolls are jackpots (see Exact.jackpot_proposal).
+        sampling            optional string, "random" for independent rolls, "stratified" to stratify the rolls of
+                            every die, or "antithetic" for pairs of negatively correlated rolls (num_of_rolls must be even).
+                            The faces are picked by inverse CDF sampling so both keep their variance reduction.
+        rng                 optional numpy.random.Generator or integer seed. Defaults to the shared generator.
+        '''
+        if sampling not in ("random", "stratified", "antithetic"):
+            raise ValueError("Entered invalid sampling, must be random, stratified or antithetic")
+        if num_of_rolls < 0:
+            raise ValueError("The num_of_rolls must not be negative")
+        probabilities = probability_matrix(self.similar_dice)
+        if proposal is None:
+            proposal = probabilities
+            mixture, tilts = jackpot_proposal(probabilities)
+        else:
+            proposal = np.broadcast_to(np.asarray(proposal, dtype=np.float64), probabilities.shape)
+            if not np.isfinite(proposal).all() or (proposal < 0).any():
+                raise ValueError("The proposal weights must be finite and non-negative")
+            totals = proposal.sum(axis=1, keepdims=True)
+            if (totals <= 0).any():
+                raise ValueError("Every die needs at least one positive proposal weight")
+            proposal = proposal / totals
+            mixture = tilts = None
+
+        rng = get_rng(rng)
+        #one column picks the mixture component of a roll, the others the face of each die
+        columns = len(self.similar_dice) + 1
+        if sampling == "stratified":
+            uniforms = stratified_uniforms(num_of_rolls, columns, rng)
+        elif sampling == "antithetic":
+            uniforms = antithetic_uniforms(num_of_rolls, columns, rng)
+            #both rolls of a pair come from the same component, so only the faces are mirrored
+            uniforms[1::2, 0] = uniforms[0::2, 0]
+        else:
+            uniforms = rng.random((num_of_rolls, columns))
+
+        codes = sample_tilted(proposal, uniforms, mixture, tilts).astype(code_dtype(len(self.faces)))
+        likelihood = likelihood_ratios(probabilities, proposal, codes, mixture, tilts)
+        self._store_play(codes, likelihood = likelihood, sampling = sampling)
+
+    def play_likelihood(self):
+        '''
+        PURPOSE
+        Show the likelihood ratio of every roll of the most recent play.
+
+        OUTPUTS
+        a numpy array of floats, one per roll. The ratios are all one unless the play was made with play_weighted.
+        '''
+        codes = self.play_codes()
+        if self._play_likelihood is None:
+            return np.ones(codes.shape[0])
+        return self._play_likelihood
+
+    def play_codes(self):
+        '''
+        PURPOSE
+        Show the result of the most recent play as a matrix of integer face codes.
+
+        OUTPUTS
+        a numpy array of unsigned integers with one row per roll and one column per die. Each value is the position
+        of the rolled face in the game's faces array.
+        '''
+        if self._play_codes is None:
+            raise ValueError("The game has not been played yet")
+        return self._play_codes
+
+    def play_chunks(self, chunk_size = 2**20, start = 0):
+        '''
+        PURPOSE
+        Hand out the face codes of the most recent play in fixed-size chunks. The chunks are views of the saved play,
+        so a play opened with load_play can be passed to Analyzer.analyze_stream without reading it all into memory.
+
+        INPUTS
+        chunk_size          optional integer, the number of rolls in each chunk. The last chunk may be smaller.
+        start               optional integer, the first roll handed out, counting from 0.
+
+        OUTPUTS
+        a generator of numpy arrays of face codes, each with one row per roll and one column per die.
+        '''
+        codes = self.play_codes()
+        for first in range(start, codes.shape[0], chunk_size):
+            yield codes[first:first + chunk_size]
+
+    @instrumented("Game.save_play", rows = lambda game, result: game._play_codes.shape[0])
+    def save_play(self, path):
+        '''
+        PURPOSE
+        Write the face codes of the most recent play to a binary file that can be memory-mapped by load_play.
+        The file starts with a small JSON header holding the faces, the weights of every die, the code dtype and shape,
+        and the seed of the play when it is known. The raw face codes follow, starting on a 64 byte boundary.
+
+        INPUTS
+        path                the path of the file to write.
+        '''
+        codes = self.play_codes()
+        header = {
+            "version": 1,
+            "dtype": codes.dtype.str,
+            "shape": list(codes.shape),
+            "faces": self.faces.tolist(),
+            "faces_dtype": self.faces.dtype.str,
+            "weights": [die.get_weights().tolist() for die in self.similar_dice],
+            "seed": self._play_seed,
+            "workers": self._play_workers,
+            "seek_start": self._play_seek_start,
+        }
+        header = json.dumps(header).encode("utf-8")
+        #pad the header with spaces so the codes start on a 64 byte boundary
+        header += b" " * (-(len(_PLAY_MAGIC) + 8 + len(header)) % 64)
+        with open(path, "wb") as play_file:
+            play_file.write(_PLAY_MAGIC)
+            play_file.write(struct.pack("<Q", len(header)))
+            play_file.write(header)
+            np.ascontiguousarray(codes).tofile(play_file)
+
+    @classmethod
+    @instrumented("Game.load_play", rows = lambda cls, result: result._play_codes.shape[0])
+    def load_play(cls, path):
+        '''
+        PURPOSE
+        Open a play written by save_play. The dice are rebuilt from the faces and weights in the header and the face codes
+        are memory-mapped read-only, so the play is not read into memory until parts of it are used.
+
+        INPUTS
+        path                the path of a file written by save_play.
+
+        OUTPUTS
+        a Game whose most recent play is the saved play.
+        '''
+        with open(path, "rb") as play_file:
+            if play_file.read(len(_PLAY_MAGIC)) != _PLAY_MAGIC:
+                raise ValueError("The file is not a saved Monte Carlo play")
+            header_length = struct.unpack("<Q", play_file.read(8))[0]
+            header = json.loads(play_file.read(header_length).decode("utf-8"))
+
+        faces = np.array(header["faces"], dtype=header["faces_dtype"])
+        dice = []
+        for weights in header["weights"]:
+            die = Die(faces)
+            die.set_weights(weights)
+            dice.append(die)
+
+        game = cls(dice)
+        offset = len(_PLAY_MAGIC) + 8 + header_length
+        codes = np.memmap(path, dtype=header["dtype"], mode="r", offset=offset, shape=tuple(header["shape"]))
+        game._store_play(codes, seed = header["seed"], workers = header["workers"], seek_start = header.get("seek_start"))
+        return game
+
+    @instrumented("Game.save_archive", rows = lambda game, result: result)
+    def save_archive(self, path, chunk_rows = 2**16, compression = "zlib", level = 6):
         '''
-        rollnumlist = []
-        dienumlist = self.similar_dice #remove this line, just so you remember what it represents
+        PURPOSE
+        Write the face codes of the most recent play to a compressed archive for long-term storage. The codes are packed
+        to the fewest bits that can hold a face code (3 bits for a six-sided die) and every chunk of rolls is compressed
+        on its own, with an index of the chunks kept in the file, so Analyzer.analyze_archive and load_archive can read
+        any range of rolls without decompressing the whole archive.
+
+        INPUTS
+        path                the path of the file to write.
+        chunk_rows          optional integer, the number of rolls per compressed chunk.
+        compression         optional string, "zlib" (default), "lzma" or "none".
+        level               optional integer, the compression level passed to zlib or lzma.
+
+        OUTPUTS
+        the number of rolls written.
+        '''
+        weights = [die.get_weights().tolist() for die in self.similar_dice]
+        return write_archive(path, self.play_chunks(chunk_rows), self.faces, weights, chunk_rows, compression, level,
+                             self._play_seed, self._play_workers, self._play_seek_start)
+
+    @classmethod
+    @instrumented("Game.load_archive", rows = lambda cls, result: result._play_codes.shape[0])
+    def load_archive(cls, path, start = 0, stop = None):
+        '''
+        PURPOSE
+        Open a play written by save_archive. The dice are rebuilt from the faces and weights stored in the archive and
+        the chosen range of rolls is decompressed into memory as the game's most recent play.
 
-        #initialize the df
-        for i in range(0,num_of_rolls):
-            rollnumlist.append(i+1)
-        result_df = pd.DataFrame(
-        {
-        'Roll Number' :rollnumlist
-        })
+        INPUTS
+        path                the path of a file written by save_archive.
+        start               optional integer, the first roll to load, counting from 0.
+        stop                optional integer, one past the last roll to load. Defaults to the end of the archive.
 
-        for i in range(0,len(self.similar_dice)):
-            for j in self.similar_dice:
-                #currentdiedf = j.die_currentstate()
-                #h = currentdiedf.index[i]
-                result_df[i+1] = j.roll_the_dice(num_of_rolls)
+        OUTPUTS
+        a Game whose most recent play is the chosen range of the archived play.
+        '''
+        archive = PlayArchive(path)
+        dice = []
+        for weights in archive.weights:
+            die = Die(archive.faces)
+            die.set_weights(weights)
+            dice.append(die)
 
-        self._play_result = result_df.set_index('Roll Number')
+        game = cls(dice)
+        whole = start == 0 and (stop is None or stop >= archive.num_rolls)
+        seekable = archive.seek_start is not None
+        #a range of a seekable play is still seekable, it starts start rolls further into the same stream
+        game._store_play(archive.read(start, stop), seed = archive.seed if whole or seekable else None,
+                         workers = archive.workers if whole else None,
+                         seek_start = archive.seek_start + start if seekable else None)
+        return game
 
+    @instrumented("Game.play_result", rows = lambda game, result: game._play_codes.shape[0])
     def play_result(self, df_format = "wide"):
         '''
         PURPOSE
@@ -68,15 +608,61 @@ class Game:
         format dataframe will show  have the roll number as a named index,
         columns for each die number (using its list index as the column name), 
         and the face rolled in that instance in each cell.
+        The dataframes are built from the face codes the first time they are asked for after a play. The faces are held
+        in categorical columns that share one copy of the face codes between both formats.
         '''
-        if df_format == "narrow":
-            Narrow = self._play_result.unstack().to_frame('Outcomes')
-            Narrow.index.names = ['Die Number','Roll Number']
-            Narrow = Narrow.reset_index().set_index(['Roll Number','Die Number'])
-            return Narrow
-            #code to return the most recent result in narrow format
-        elif df_format == "wide":
-            return self._play_result
-        else:
+        if df_format not in ("wide", "narrow"):
             raise ValueError("Entered invalid dataframe format, must be narrow or wide")
-        
\ No newline at end of file
+        cache_event("Game.play_frames", df_format in self._play_frames)
+        if df_format not in self._play_frames:
+            self._play_frames[df_format] = self._build_play_frame(df_format)
+        return self._play_frames[df_format]
+
+    def _build_play_frame(self, df_format):
+        '''
+        PURPOSE
+        Build the wide or narrow dataframe of the most recent play. Both formats hold the faces as categorical columns
+        whose codes are views of one die-major copy of the face codes, made once per play, so the second format costs no
+        extra memory for its values. The faces dtype and the narrow multiindex are kept on the game and reused by later
+        plays with the same number of rolls.
+        '''
+        import pandas as pd
+        codes = self._category_codes()
+        num_dice, num_rolls = codes.shape
+        if df_format == "narrow":
+            outcomes = pd.Categorical.from_codes(codes.reshape(-1), dtype = self._faces_dtype, validate = False)
+            return pd.DataFrame({'Outcomes': outcomes}, index = self._narrow_index(num_rolls, num_dice), copy = False)
+
+        columns = {die + 1: pd.Categorical.from_codes(codes[die], dtype = self._faces_dtype, validate = False)
+                   for die in range(num_dice)}
+        return pd.DataFrame(columns, index = pd.RangeIndex(1, num_rolls + 1, name = 'Roll Number'), copy = False)
+
+    def _category_codes(self):
+        '''
+        PURPOSE
+        Return the face codes of the most recent play as one die-major (dice x rolls) array in the signed integer dtype
+        pandas uses for categorical codes, building it and the categorical faces dtype the first time they are needed.
+        '''
+        import pandas as pd
+        if self._faces_dtype is None:
+            self._faces_dtype = pd.CategoricalDtype(self.faces)
+        if "codes" not in self._play_frames:
+            code_type = _categorical_code_dtype(len(self.faces))
+            self._play_frames["codes"] = np.ascontiguousarray(self.play_codes().T, dtype = code_type)
+        return self._play_frames["codes"]
+
+    def _narrow_index(self, num_rolls, num_dice):
+        '''
+        PURPOSE
+        Return the (Roll Number, Die Number) multiindex of a narrow play frame in die-major order, reusing the last one
+        built when the shape of the play is the same.
+        '''
+        import pandas as pd
+        if self._narrow_index_cache is None or self._narrow_index_cache[0] != (num_rolls, num_dice):
+            rolls = np.arange(num_rolls, dtype = _categorical_code_dtype(num_rolls))
+            dice = np.arange(num_dice, dtype = _categorical_code_dtype(num_dice))
+            index = pd.MultiIndex(levels = [pd.RangeIndex(1, num_rolls + 1), pd.RangeIndex(1, num_dice + 1)],
+                                  codes = [np.tile(rolls, num_dice), np.repeat(dice, num_rolls)],
+                                  names = ['Roll Number', 'Die Number'], verify_integrity = False)
+            self._narrow_index_cache = ((num_rolls, num_dice), index)
+        return self._narrow_index_cache[1]
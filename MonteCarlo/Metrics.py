@@ -0,0 +1,183 @@
+import functools
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+#registry that instrumented calls report to, None while instrumentation is off
+_registry = None
+
+class MetricsRegistry:
+    '''
+    The purpose of this file is to collect timing and memory measurements of the Die, Game and Analyzer methods.
+
+    While a registry is active (see collect) every instrumented call adds a record with its wall time, the number of
+    rows it processed and, when memory tracing is on, the peak memory it allocated. Cached objects such as alias tables
+    and play dataframes report whether they were reused (a cache hit) or built again (a cache miss).
+
+    Summary: This class can hold per-call records and cache counts and summarize them as a dataframe.
+    '''
+    def __init__(self, callback = None, trace_memory = False):
+        '''
+        PURPOSE
+        Create an empty registry.
+
+        INPUTS
+        callback        optional function called as callback(record) with the dictionary of every call as it is recorded.
+        trace_memory    optional boolean, when True the peak memory allocated by each call is traced with tracemalloc.
+                        Tracing slows the code down, so it is off by default.
+        '''
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.records = []
+        self.cache = {}
+        #one [starting memory, peak memory carried over from before a nested call] pair per running traced call
+        self._memory_frames = []
+
+    def record(self, name, seconds, rows = None, peak_bytes = None):
+        '''
+        PURPOSE
+        Add the record of one call.
+
+        INPUTS
+        name          the name of the instrumented method, e.g. "Game.play".
+        seconds       the wall time of the call.
+        rows          optional integer, the number of rows (rolls) the call processed.
+        peak_bytes    optional integer, the peak memory allocated during the call.
+        '''
+        record = {"name": name, "seconds": seconds, "rows": rows, "peak_bytes": peak_bytes}
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def cache_event(self, name, hit):
+        '''
+        PURPOSE
+        Count a cache hit or miss for a named cache.
+        '''
+        counts = self.cache.setdefault(name, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+    def _start_memory(self):
+        '''
+        PURPOSE
+        Start tracing the memory of a call. The peak seen so far is carried over by the caller's frame because
+        tracemalloc only keeps one peak, which is reset here.
+        '''
+        current, peak = tracemalloc.get_traced_memory()
+        if self._memory_frames:
+            self._memory_frames[-1][1] = max(self._memory_frames[-1][1], peak)
+        tracemalloc.reset_peak()
+        self._memory_frames.append([current, current])
+
+    def _stop_memory(self):
+        '''
+        PURPOSE
+        Stop tracing the memory of a call and return the peak number of bytes it allocated.
+        '''
+        start, carried = self._memory_frames.pop()
+        return max(carried, tracemalloc.get_traced_memory()[1]) - start
+
+    def summary(self):
+        '''
+        PURPOSE
+        Summarize the records and cache counts per name.
+
+        OUTPUTS
+        a dataframe indexed by name with the columns calls, seconds (total), mean_seconds, rows (total),
+        rows_per_second, peak_bytes (largest), cache_hits and cache_misses.
+        '''
+        import pandas as pd
+        columns = ["calls", "seconds", "mean_seconds", "rows", "rows_per_second", "peak_bytes", "cache_hits", "cache_misses"]
+        records = pd.DataFrame(self.records, columns = ["name", "seconds", "rows", "peak_bytes"])
+        calls = records.groupby("name").agg(calls = ("seconds", "size"), seconds = ("seconds", "sum"),
+                                            rows = ("rows", "sum"), peak_bytes = ("peak_bytes", "max"))
+        calls["mean_seconds"] = calls["seconds"] / calls["calls"]
+        calls["rows_per_second"] = calls["rows"] / calls["seconds"]
+        cache = pd.DataFrame.from_dict(self.cache, orient = "index", columns = ["hits", "misses"])
+        cache.columns = ["cache_hits", "cache_misses"]
+        summary = calls.join(cache, how = "outer").reindex(columns = columns)
+        summary[["calls", "cache_hits", "cache_misses"]] = summary[["calls", "cache_hits", "cache_misses"]].fillna(0).astype(int)
+        summary.index.name = "name"
+        return summary
+
+    def clear(self):
+        '''
+        PURPOSE
+        Drop every record and cache count.
+        '''
+        self.records = []
+        self.cache = {}
+
+
+@contextmanager
+def collect(callback = None, trace_memory = False):
+    '''
+    PURPOSE
+    Turn instrumentation on for the duration of a with block. Registries can be nested, the inner one receives the
+    records until its block ends.
+
+    INPUTS
+    callback        optional function called as callback(record) with every call record.
+    trace_memory    optional boolean, when True the peak memory of each call is traced with tracemalloc.
+
+    OUTPUTS
+    the active MetricsRegistry, which keeps its records after the block ends.
+    '''
+    global _registry
+    previous = _registry
+    registry = MetricsRegistry(callback, trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _registry = registry
+    try:
+        yield registry
+    finally:
+        _registry = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+def enabled():
+    '''
+    PURPOSE
+    Check if instrumentation is on.
+    '''
+    return _registry is not None
+
+def instrumented(name, rows = None):
+    '''
+    PURPOSE
+    Decorate a method so its calls are recorded while a registry is active. While instrumentation is off the
+    decorated method only checks one global before calling the original method.
+
+    INPUTS
+    name    the name the calls are recorded under, e.g. "Game.play".
+    rows    optional function called as rows(self, result) after the call, returning the number of rows processed.
+    '''
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            registry = _registry
+            if registry is None:
+                return method(self, *args, **kwargs)
+            trace_memory = registry.trace_memory and tracemalloc.is_tracing()
+            if trace_memory:
+                registry._start_memory()
+            start = time.perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                peak_bytes = registry._stop_memory() if trace_memory else None
+            registry.record(name, seconds, rows(self, result) if rows is not None else None, peak_bytes)
+            return result
+        return wrapper
+    return decorate
+
+def cache_event(name, hit):
+    '''
+    PURPOSE
+    Count a cache hit or miss in the active registry, does nothing while instrumentation is off.
+    '''
+    if _registry is not None:
+        _registry.cache_event(name, hit)
@@ -1,12 +1,31 @@
-from Analyzer import Analyzer
-from Die import Die
-from Game import Game
+#the sibling modules are imported the same way the package modules import each other, so a test run as part of the
+#package (python -m pytest) and a test run as a script (python MonteCarloTest.py) each see one copy of every module
+try:
+    from .Analyzer import Analyzer
+    from .Die import Die
+    from .Game import Game
+    from . import Benchmark
+    from . import Metrics
+    from .Sweep import run_sweep
+    from .Sketch import HeavyHitterReducer
+except ImportError:
+    from Analyzer import Analyzer
+    from Die import Die
+    from Game import Game
+    import Benchmark
+    import Metrics
+    from Sweep import run_sweep
+    from Sketch import HeavyHitterReducer
 from MonteCarlo import Die
 from MonteCarlo import Game
 from MonteCarlo import Analyzer
 
 
 import unittest
+import subprocess
+import sys
+import os
+import tempfile
 import pandas as pd
 import numpy as np
 
@@ -47,11 +66,11 @@ class MonteCarloSuite(unittest.TestCase):
 
     def test_3_roll_die(self): 
         """
-        Test if the roll_the_dice method from Die successfully returns a python list
+        Test if the roll_the_dice method from Die successfully returns a python list in the strings output format
         """
         myFaces = np.array([1,2,3,"a","b","c"])
         myDie = Die(myFaces)
-        myResult = myDie.roll_the_dice(10)
+        myResult = myDie.roll_the_dice(10, output="strings")
         self.assertTrue(type(myResult ) == list)
 
 
@@ -171,6 +190,554 @@ class MonteCarloSuite(unittest.TestCase):
         currentdf = testanalyzer.permutation_count()
         self.assertTrue(type(currentdf) == pd.core.frame.DataFrame)
     
+    def test_13_roll_die_array(self):
+        """
+        Test if the roll_the_dice method from Die returns a numpy array of faces by default, and that
+        the same seed gives the same rolls
+        """
+        myFaces = np.array([1,2,3,4,5,6])
+        myDie = Die(myFaces)
+        myResult = myDie.roll_the_dice(10, rng=7)
+        self.assertTrue(type(myResult) == np.ndarray)
+        self.assertEqual(len(myResult), 10)
+        self.assertTrue(np.isin(myResult, myFaces).all())
+        self.assertTrue((myResult == myDie.roll_the_dice(10, rng=7)).all())
+
+    def test_14_alias_table_rebuild(self):
+        """
+        Test if changing a weight after rolling rebuilds the alias table, so a face with weight zero is never rolled
+        """
+        myFaces = np.array(["a","b","c"])
+        myDie = Die(myFaces)
+        myDie.roll_the_dice(5)
+        myDie.change_side_weight("a", 0)
+        myDie.change_side_weight("b", 0)
+        myResult = myDie.roll_the_dice(100)
+        self.assertTrue((myResult == "c").all())
+
+    def test_15_play_each_die(self):
+        """
+        Test if the play method from Game rolls each die in its own column and stores integer face codes
+        """
+        myFaces = np.array(["a","b","c"])
+        dieA = Die(myFaces)
+        dieA.change_side_weight("b", 0)
+        dieA.change_side_weight("c", 0)
+        dieC = Die(myFaces)
+        dieC.change_side_weight("a", 0)
+        dieC.change_side_weight("b", 0)
+        myGame = Game([dieA, dieC])
+        myGame.play(20, rng=3)
+        currentdf = myGame.play_result()
+        self.assertTrue((currentdf[1] == "a").all())
+        self.assertTrue((currentdf[2] == "c").all())
+        self.assertEqual(myGame._play_codes.dtype, np.uint8)
+        self.assertRaises(ValueError, Game, [dieA, Die(np.array([1,2,3]))])
+
+    def test_16_play_codes(self):
+        """
+        Test if the play_codes method from Game returns the integer face codes that the play_result dataframe is built from,
+        and that the dataframe is only built again after a new play
+        """
+        myFaces = np.array(["a","b","c"])
+        myDie = Die(myFaces)
+        myGame = Game([myDie, myDie, myDie])
+        myGame.play(10)
+        codes = myGame.play_codes()
+        self.assertEqual(codes.shape, (10, 3))
+        self.assertTrue((myGame.play_result().values == myFaces[codes]).all())
+        self.assertTrue(myGame.play_result() is myGame.play_result())
+        firstdf = myGame.play_result()
+        myGame.play(10)
+        self.assertFalse(myGame.play_result() is firstdf)
+
+    def test_17_combo_count_totals(self):
+        """
+        Test if the combo_count method from Analyzer counts every roll once and treats rolls in any order as the same combination
+        """
+        myfaces = np.array([1,2,3])
+        myDie = Die(myfaces)
+        myGame = Game([myDie, myDie])
+        myGame.play(50)
+        testanalyzer = Analyzer(myGame)
+        currentdf = testanalyzer.combo_count(include_unobserved=True)
+        self.assertEqual(currentdf.Counts.sum(), 50)
+        self.assertEqual(len(currentdf), 6)
+
+    def test_18_jackpot_by_face(self):
+        """
+        Test if the jackpot method from Analyzer breaks the jackpots down by face when by_face is True
+        """
+        myfaces = np.array(["a","b","c"])
+        myDie = Die(myfaces)
+        myDie.change_side_weight("b", 0)
+        myDie.change_side_weight("c", 0)
+        myGame = Game([myDie, myDie, myDie])
+        myGame.play(25)
+        testanalyzer = Analyzer(myGame)
+        currentdf = testanalyzer.jackpot(by_face=True)
+        self.assertEqual(testanalyzer.jackpot(), 25)
+        self.assertEqual(list(currentdf.Jackpots), [25, 0, 0])
+
+    def test_19_permutation_count_unobserved(self):
+        """
+        Test if the permutation_count method from Analyzer only lists rolled permutations by default and
+        adds the permutations that were never rolled with a count of zero when asked to
+        """
+        myfaces = np.array(["a","b","c"])
+        myDie = Die(myfaces)
+        myGame = Game([myDie, myDie])
+        myGame.play(4)
+        testanalyzer = Analyzer(myGame)
+        currentdf = testanalyzer.permutation_count()
+        fulldf = testanalyzer.permutation_count(include_unobserved=True)
+        self.assertEqual(currentdf.Counts.sum(), 4)
+        self.assertTrue((currentdf.Counts > 0).all())
+        self.assertEqual(len(fulldf), 9)
+        self.assertEqual(fulldf.Counts.sum(), 4)
+
+    def test_20_combo_count_order_independent(self):
+        """
+        Test if the combo_count method from Analyzer counts rolls holding the same faces in a different order as one combination
+        """
+        myfaces = np.array(["a","b"])
+        dieA = Die(myfaces)
+        dieA.change_side_weight("b", 0)
+        dieB = Die(myfaces)
+        dieB.change_side_weight("a", 0)
+        myGame = Game([dieA, dieB])
+        myGame.play(10)
+        otherGame = Game([dieB, dieA])
+        otherGame.play(10)
+        self.assertEqual(list(Analyzer(myGame).combo_count().Counts), [10])
+        self.assertTrue(Analyzer(myGame).combo_count().equals(Analyzer(otherGame).combo_count()))
+
+    def test_21_analyze_stream(self):
+        """
+        Test if the analyze_stream method from Analyzer gives the same counts over a chunked play_stream as
+        the Analyzer methods give over the same rolls played in one piece
+        """
+        myfaces = np.array(["a","b","c"])
+        myDie = Die(myfaces)
+        myGame = Game([myDie, myDie])
+        testanalyzer = Analyzer(myGame)
+        results = testanalyzer.analyze_stream(myGame.play_stream(100, chunk_size=30, rng=5))
+        myGame.play(100, rng=5)
+        self.assertEqual(results["rolls"], 100)
+        self.assertEqual(results["face_counts"].Counts.sum(), 200)
+        self.assertEqual(results["jackpot"].Jackpots.sum(), testanalyzer.jackpot())
+        self.assertTrue((results["combo_count"].Counts.values == testanalyzer.combo_count().Counts.values).all())
+        self.assertTrue((results["permutation_count"].Counts.values == testanalyzer.permutation_count().Counts.values).all())
+
+    def test_22_play_parallel(self):
+        """
+        Test if the play_parallel method from Game plays every roll and gives the same result for the same seed and workers
+        """
+        myfaces = np.array([1,2,3,4,5,6])
+        myDie = Die(myfaces)
+        myGame = Game([myDie, myDie, myDie])
+        myGame.play_parallel(1001, workers=2, seed=11)
+        firstcodes = myGame.play_codes().copy()
+        myGame.play_parallel(1001, workers=2, seed=11)
+        self.assertEqual(firstcodes.shape, (1001, 3))
+        self.assertTrue((firstcodes == myGame.play_codes()).all())
+
+    def test_23_analyze_parallel(self):
+        """
+        Test if the analyze_parallel method from Analyzer merges the worker results into counts over every roll
+        """
+        myfaces = np.array(["a","b","c"])
+        myDie = Die(myfaces)
+        myGame = Game([myDie, myDie])
+        testanalyzer = Analyzer(myGame)
+        results = testanalyzer.analyze_parallel(500, workers=2, seed=3, chunk_size=100)
+        again = testanalyzer.analyze_parallel(500, workers=2, seed=3, chunk_size=100)
+        self.assertEqual(results["rolls"], 500)
+        self.assertEqual(results["permutation_count"].Counts.sum(), 500)
+        self.assertTrue(results["combo_count"].equals(again["combo_count"]))
+
+    def test_24_save_load_play(self):
+        """
+        Test if a play written with save_play from Game is memory-mapped by load_play with the same face codes, faces and weights
+        """
+        myfaces = np.array(["a","b","c"])
+        myDie = Die(myfaces)
+        myDie.change_side_weight("a", 4)
+        myGame = Game([myDie, myDie])
+        myGame.play(200, rng=8)
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "play.mcplay")
+            myGame.save_play(path)
+            loadedGame = Game.load_play(path)
+            self.assertTrue(isinstance(loadedGame.play_codes(), np.memmap))
+            self.assertTrue((loadedGame.play_codes() == myGame.play_codes()).all())
+            self.assertTrue(loadedGame.play_result().equals(myGame.play_result()))
+            self.assertEqual(loadedGame.similar_dice[0].die_currentstate().weights["a"], 4)
+            self.assertEqual(Analyzer(loadedGame).jackpot(), Analyzer(myGame).jackpot())
+            del loadedGame
+
+    def test_25_face_counts_per_roll_counts(self):
+        """
+        Test if the face_counts_per_roll method from Analyzer counts every die once per roll, in both the dense and sparse formats
+        """
+        myfaces = np.array(["a","b","c","d"])
+        myDie = Die(myfaces)
+        myGame = Game([myDie, myDie, myDie])
+        myGame.play(40)
+        testanalyzer = Analyzer(myGame)
+        currentdf = testanalyzer.face_counts_per_roll()
+        self.assertEqual(list(currentdf.columns), ["a","b","c","d"])
+        self.assertTrue((currentdf.sum(axis=1) == 3).all())
+        self.assertTrue(currentdf.loc[1, myGame.play_result().loc[1, 1]] > 0)
+        try:
+            import scipy
+        except ImportError:
+            self.skipTest("scipy not installed")
+        sparsedf = testanalyzer.face_counts_per_roll(sparse=True)
+        self.assertTrue((sparsedf.sparse.to_dense().values == currentdf.values).all())
+
+    def test_26_set_weights(self):
+        """
+        Test if the set_weights method from Die changes weights from a dictionary or an array and counts the change
+        """
+        myFaces = np.array(["a","b","c"])
+        myDie = Die(myFaces)
+        startversion = myDie.weights_version
+        myDie.set_weights({"b": 5})
+        self.assertEqual(list(myDie.get_weights()), [1.0, 5.0, 1.0])
+        myDie.set_weights(np.array([0, 0, 2]))
+        self.assertEqual(myDie.die_currentstate().weights["c"], 2)
+        self.assertEqual(myDie.weights_version, startversion + 2)
+        self.assertTrue((myDie.roll_the_dice(20) == "c").all())
+        self.assertRaises(IndexError, myDie.set_weights, {"z": 1})
+        self.assertRaises(ValueError, myDie.set_weights, [1, 2])
+
+    def test_27_die_unique_faces(self):
+        """
+        Test if the Die initializer accepts many distinct faces and raises a ValueError for repeated faces
+        """
+        myDie = Die(np.arange(100000))
+        self.assertEqual(len(myDie.die_currentstate()), 100000)
+        self.assertRaises(ValueError, Die, np.array(["a","b","a"]))
+
+    def test_28_exact_distribution(self):
+        """
+        Test if the exact_distribution method from Analyzer computes probabilities from the weights, and if the counting
+        methods add an Expected column when asked to
+        """
+        myfaces = np.array(["a","b"])
+        fairDie = Die(myfaces)
+        unfairDie = Die(myfaces)
+        unfairDie.set_weights([3, 1])
+        myGame = Game([fairDie, unfairDie])
+        myGame.play(100)
+        testanalyzer = Analyzer(myGame)
+        jackpots = testanalyzer.exact_distribution("jackpot")
+        self.assertAlmostEqual(jackpots.Probability["a"], 0.375)
+        self.assertAlmostEqual(jackpots.Probability["b"], 0.125)
+        combos = testanalyzer.exact_distribution("combo_count")
+        self.assertAlmostEqual(combos.Probability[("a","b")], 0.5)
+        self.assertAlmostEqual(testanalyzer.exact_distribution("permutation_count").Probability.sum(), 1)
+        self.assertAlmostEqual(testanalyzer.permutation_count(include_unobserved=True, expected=True).Expected.sum(), 100)
+        self.assertAlmostEqual(testanalyzer.jackpot(expected=True).Expected["a"], 37.5)
+
+    def test_29_play_adaptive(self):
+        """
+        Test if the play_adaptive method from Game stops once the target relative error is reached and saves every roll made
+        """
+        myfaces = np.array(["a","b","c"])
+        myDie = Die(myfaces)
+        myGame = Game([myDie, myDie])
+        summary = myGame.play_adaptive("jackpot", rel_error=0.05, batch_size=1000, rng=2)
+        self.assertTrue(summary["converged"])
+        self.assertTrue(summary["relative_error"] <= 0.05)
+        self.assertTrue(summary["lower"] < 1/3 < summary["upper"])
+        self.assertEqual(len(myGame.play_result()), summary["rolls"])
+        self.assertEqual(summary["rolls"] % 1000, 0)
+        capped = myGame.play_adaptive("a", rel_error=0.0001, batch_size=100, max_rolls=300)
+        self.assertFalse(capped["converged"])
+        self.assertEqual(capped["rolls"], 300)
+
+    def test_30_benchmark(self):
+        """
+        Test if the benchmark suite times every case of a small sweep and finds no regression against its own results
+        """
+        results = Benchmark.run_benchmarks({"faces": [3], "dice": [2], "rolls": [50]}, repeat=1, min_seconds=0.001)
+        cases = [result["case"] for result in results["results"]]
+        self.assertIn("Game.play", cases)
+        self.assertIn("Analyzer.permutation_count", cases)
+        self.assertTrue(all(result["peak_mb"] >= 0 for result in results["results"]))
+        comparisons = Benchmark.compare(results, results)
+        self.assertEqual(len(comparisons), len(cases))
+        self.assertFalse(any(comparison["regression"] for comparison in comparisons))
+        #a case too fast to time reliably is never flagged, however much slower it got, unlike a slower case
+        def timed(seconds):
+            return dict(results, results=[dict(result, seconds=seconds) for result in results["results"]])
+        fast = Benchmark.MIN_CASE_SECONDS / 100
+        self.assertFalse(any(comparison["regression"] for comparison in Benchmark.compare(timed(fast * 10), timed(fast))))
+        self.assertTrue(all(comparison["regression"] for comparison in Benchmark.compare(timed(0.01), timed(0.001))))
+
+    def test_31_metrics(self):
+        """
+        Test if calls and cache hits are recorded while metrics are collected and nothing is recorded after
+        """
+        myDie = Die(np.array(["a", "b", "c"]))
+        myGame = Game([myDie, myDie])
+        seen = []
+        with Metrics.collect(callback=seen.append, trace_memory=True) as registry:
+            myGame.play(100, rng=1)
+            myGame.play_result()
+            myGame.play_result()
+            Analyzer(myGame).jackpot()
+        summary = registry.summary()
+        self.assertEqual(summary.loc["Game.play", "calls"], 1)
+        self.assertEqual(summary.loc["Game.play", "rows"], 100)
+        self.assertEqual(summary.loc["Game.play_result", "calls"], 2)
+        self.assertEqual(summary.loc["Game.play_frames", "cache_hits"], 1)
+        self.assertEqual(summary.loc["Game.play_frames", "cache_misses"], 1)
+        self.assertIn("Analyzer.jackpot", summary.index)
+        self.assertTrue((summary["peak_bytes"].dropna() >= 0).all())
+        self.assertEqual(len(seen), len(registry.records))
+        self.assertFalse(Metrics.enabled())
+        myGame.play(10)
+        self.assertEqual(len(seen), len(registry.records))
+
+    def test_32_rare_event_probability(self):
+        """
+        Test if weighted plays give jackpot estimates close to the exact probability with a smaller error than a plain play
+        """
+        dice = []
+        for i in range(8):
+            myDie = Die(np.arange(6))
+            myDie.change_side_weight(5, 3)
+            dice.append(myDie)
+        myGame = Game(dice)
+        myAnalyzer = Analyzer(myGame)
+        exact = myAnalyzer.exact_distribution()["Probability"].sum()
+        myGame.play(20000, rng=3)
+        plain = myAnalyzer.rare_event_probability()
+        for sampling in ["random", "stratified", "antithetic"]:
+            myGame.play_weighted(20000, sampling=sampling, rng=3)
+            weighted = myAnalyzer.rare_event_probability()
+            self.assertLess(abs(weighted["estimate"] - exact), 4 * weighted["std_error"])
+            self.assertLess(weighted["std_error"], plain["std_error"] / 2)
+        self.assertEqual(len(myGame.play_likelihood()), 20000)
+        with self.assertRaises(ValueError):
+            myGame.play_weighted(11, sampling="antithetic")
+        for proposal in [np.zeros(6), np.full(6, np.nan), np.array([1, 1, 1, 1, 1, -1])]:
+            with self.assertRaises(ValueError):
+                myGame.play_weighted(100, proposal=proposal)
+        #fair dice, where a jackpot has a chance of 6 / 6 ** 10
+        fairGame = Game([Die(np.arange(6)) for i in range(10)])
+        fairGame.play_weighted(20000, rng=4)
+        weighted = Analyzer(fairGame).rare_event_probability()
+        self.assertGreater(weighted["hits"], 5000)
+        self.assertLess(abs(weighted["estimate"] - 6 / 6**10), 4 * weighted["std_error"])
+        fairGame.play(1000, rng=4)
+        plain = Analyzer(fairGame).rare_event_probability()
+        self.assertEqual(plain["hits"], 0)
+        self.assertTrue(np.isnan(plain["std_error"]))
+        self.assertAlmostEqual(plain["upper"], -np.log(0.05) / 1000)
+        #many faces, where every face has its own mixture component
+        manyGame = Game([Die(np.arange(200)) for i in range(5)])
+        with Metrics.collect(trace_memory=True) as registry:
+            manyGame.play_weighted(70000, rng=5)
+        peak = [record["peak_bytes"] for record in registry.records if record["name"] == "Game.play_weighted"]
+        self.assertLess(peak[0], 64 * 2**20)
+        self.assertTrue(np.isfinite(manyGame.play_likelihood()).all())
+
+    def test_33_run_sweep(self):
+        """
+        Test if a sweep returns one row per scenario and face, counts every roll and respects zero weights
+        """
+        weights = np.ones((4, 2, 3))
+        weights[1, :, 0] = 0
+        sweep = run_sweep(np.array(["a", "b", "c"]), weights, 500, rng=2)
+        self.assertEqual(sweep.shape, (12, 4))
+        self.assertEqual(list(sweep.index.names), ["Scenario", "Faces"])
+        self.assertTrue((sweep.groupby("Scenario")["Counts"].sum() == 1000).all())
+        self.assertEqual(sweep.loc[(1, "a"), "Counts"], 0)
+        self.assertAlmostEqual(sweep.loc[(0, "a"), "Expected Jackpots"], 500 / 9)
+        with self.assertRaises(ValueError):
+            run_sweep(np.array(["a", "b", "c"]), np.ones((2, 3)), 10)
+
+    def test_34_incremental_analyzer(self):
+        """
+        Test if appended rolls are added to the cached counts and a new play replaces them
+        """
+        myDie = Die(np.array([1, 2, 3]))
+        myGame = Game([myDie, myDie, myDie])
+        myAnalyzer = Analyzer(myGame)
+        myGame.play(500, rng=4)
+        generation = myGame.generation
+        myAnalyzer.combo_count()
+        myAnalyzer.jackpot()
+        myGame.play(300, rng=5, append=True)
+        self.assertEqual(myGame.generation, generation)
+        self.assertEqual(len(myGame.play_codes()), 800)
+        fresh = Analyzer(myGame)
+        self.assertTrue(myAnalyzer.combo_count().equals(fresh.combo_count()))
+        self.assertEqual(myAnalyzer.jackpot(), fresh.jackpot())
+        self.assertEqual(myAnalyzer.permutation_count()["Counts"].sum(), 800)
+        myGame.play(100, rng=6)
+        self.assertEqual(myGame.generation, generation + 1)
+        self.assertEqual(myAnalyzer.combo_count()["Counts"].sum(), 100)
+
+    def test_35_lazy_package_import(self):
+        """
+        Test if the package loads its classes on first use and only imports pandas when a dataframe is built
+        """
+        script = ("import sys, numpy as np, MonteCarlo\n"
+                  "assert 'MonteCarlo.Game' not in sys.modules\n"
+                  "die = MonteCarlo.Die(np.arange(6))\n"
+                  "game = MonteCarlo.Game([die, die])\n"
+                  "game.play(100, rng=1)\n"
+                  "assert MonteCarlo.Analyzer(game).jackpot() >= 0\n"
+                  "assert 'pandas' not in sys.modules\n"
+                  "game.play_result()\n"
+                  "assert 'pandas' in sys.modules\n")
+        package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", script], cwd=package_parent, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_36_categorical_play_result(self):
+        """
+        Test if both play_result formats hold categorical faces backed by one code array and reuse the narrow index
+        """
+        myFaces = np.array(["a", "b", "c"])
+        myDie = Die(myFaces)
+        myGame = Game([myDie, myDie, myDie])
+        myGame.play(50, rng=7)
+        wide = myGame.play_result("wide")
+        narrow = myGame.play_result("narrow")
+        self.assertTrue(all(isinstance(dtype, pd.CategoricalDtype) for dtype in wide.dtypes))
+        self.assertEqual(list(narrow.index.names), ["Roll Number", "Die Number"])
+        self.assertEqual(narrow.loc[(4, 2), "Outcomes"], wide.loc[4, 2])
+        self.assertTrue(np.shares_memory(wide[2].array.codes, narrow["Outcomes"].array.codes))
+        myGame.play(50, rng=8)
+        self.assertTrue(myGame.play_result("narrow").index is narrow.index)
+
+    def test_37_play_archive(self):
+        """
+        Test if an archived play is bit-packed, loads back exactly and can be analyzed by roll range
+        """
+        myDie = Die(np.array([1, 2, 3, 4, 5, 6]))
+        myGame = Game([myDie, myDie])
+        myGame.play(1000, rng=9)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "play.mca")
+            self.assertEqual(myGame.save_archive(path, chunk_rows=128, compression="none"), 1000)
+            #3 bits per face code instead of a whole byte
+            self.assertLess(os.path.getsize(path), 1000 * 2)
+            loadedGame = Game.load_archive(path)
+            self.assertTrue((loadedGame.play_codes() == myGame.play_codes()).all())
+            partGame = Game.load_archive(path, 100, 300)
+            self.assertTrue((partGame.play_codes() == myGame.play_codes()[100:300]).all())
+            results = Analyzer(myGame).analyze_archive(path, 100, 300, statistics=("jackpot",))
+            self.assertEqual(results["rolls"], 200)
+            self.assertEqual(results["jackpot"]["Jackpots"].sum(), Analyzer(partGame).jackpot())
+
+    def test_38_play_seekable(self):
+        """
+        Test if a seekable play can be regenerated from any roll and does not depend on the number of workers
+        """
+        myDie = Die(np.array([1, 2, 3, 4, 5, 6]))
+        myDie.change_side_weight(3, 4)
+        myGame = Game([myDie, myDie])
+        myGame.play_seekable(1000, seed=21)
+        codes = myGame.play_codes()
+        self.assertTrue((myGame.roll_range(250, 700) == codes[250:700]).all())
+        myGame.play_seekable(100, seed=np.int64(21), start=np.int64(900))
+        self.assertTrue((myGame.play_codes() == codes[900:]).all())
+        with tempfile.TemporaryDirectory() as folder:
+            myGame.save_play(os.path.join(folder, "play.mcp"))
+            myGame.save_archive(os.path.join(folder, "play.mca"))
+            self.assertTrue((Game.load_play(os.path.join(folder, "play.mcp")).roll_range(950, 1000) == codes[950:]).all())
+        with self.assertRaises(TypeError):
+            myGame.play_seekable(10, seed=21, start=1.5)
+        with self.assertRaises(ValueError):
+            myGame.play_seekable(10, seed=21, start=-1)
+        myGame.play_parallel(1000, workers=2, seed=21, seekable=True)
+        self.assertTrue((myGame.play_codes() == codes).all())
+        self.assertTrue((myDie.roll_range(5, 15, 3) == myDie.roll_range(0, 20, 3)[5:15]).all())
+        myGame.play(10)
+        with self.assertRaises(ValueError):
+            myGame.roll_range(0, 10)
+
+    def test_39_top_permutations(self):
+        """
+        Test if the heavy hitter sketch finds the most frequent rolls with bounds that hold and merges across chunks
+        """
+        myDie = Die(np.arange(10))
+        myDie.change_side_weight(0, 20)
+        myGame = Game([myDie, myDie, myDie])
+        myGame.play(5000, rng=4)
+        myAnalyzer = Analyzer(myGame)
+        top = myAnalyzer.top_permutations(3, capacity=64, width=256)
+        exact = myAnalyzer.permutation_count()["Counts"]
+        self.assertEqual(top.index[0], (0, 0, 0))
+        self.assertTrue((top["Lower Bound"] <= exact[top.index]).all())
+        self.assertTrue((exact[top.index] <= top["Counts"]).all())
+        self.assertTrue((exact.drop(top.index) <= top.attrs["max_unlisted_count"]).all())
+        self.assertEqual(myAnalyzer.top_combinations(1).index[0], (0, 0, 0))
+        with Metrics.collect() as registry:
+            myAnalyzer.top_permutations(2)
+            myAnalyzer.rare_event_probability()
+        self.assertEqual([record["name"] for record in registry.records],
+                         ["Analyzer.top_permutations", "Analyzer.rare_event_probability"])
+        codes = myGame.play_codes()
+        whole = HeavyHitterReducer(10, 3, capacity=64).update(codes)
+        merged = HeavyHitterReducer(10, 3, capacity=64).update(codes[:2500])
+        merged.merge(HeavyHitterReducer(10, 3, capacity=64).update(codes[2500:]))
+        self.assertTrue((whole.result(1)[0] == merged.result(1)[0]).all())
+
+    def test_40_expected_counts_zero_weight(self):
+        """
+        Test if expected combination counts for a die with a zero-weight face give no numpy warnings
+        """
+        myDie = Die(np.array([1, 2, 3]))
+        myDie.change_side_weight(3, 0)
+        myGame = Game([myDie, myDie])
+        myGame.play(100, rng=1)
+        with np.errstate(all="raise"):
+            combinations = Analyzer(myGame).combo_count(include_unobserved=True, expected=True)
+        self.assertEqual(combinations.loc[[(1, 3)], "Expected"].iloc[0], 0.0)
+        self.assertAlmostEqual(combinations["Expected"].sum(), 100)
+
+    def test_41_analyze_loaded_play_in_chunks(self):
+        """
+        Test if counting permutations of a memory-mapped play allocates less than the play itself
+        """
+        myDie = Die(np.arange(6))
+        myGame = Game([myDie, myDie])
+        myGame.play(2**21, rng=2)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "play.mcp")
+            myGame.save_play(path)
+            loadedGame = Game.load_play(path)
+            with Metrics.collect(trace_memory=True) as registry:
+                counts = Analyzer(loadedGame).permutation_count()
+            self.assertEqual(counts["Counts"].sum(), 2**21)
+            peak = [record["peak_bytes"] for record in registry.records if record["name"] == "Analyzer.permutation_count"]
+            self.assertLess(peak[0], os.path.getsize(path))
+            del loadedGame, counts
+
+    def test_42_package_names_are_classes(self):
+        """
+        Test if the package returns the classes, not the modules of the same name, whatever name is used first
+        """
+        script = ("import inspect, numpy as np, MonteCarlo\n"
+                  "assert inspect.isclass(MonteCarlo.Analyzer)\n"
+                  "assert inspect.isclass(MonteCarlo.Game)\n"
+                  "assert inspect.isclass(MonteCarlo.Die)\n"
+                  "from MonteCarlo import Game, Die\n"
+                  "MonteCarlo.Analyzer(Game([Die(np.arange(3))]))\n")
+        package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for first in ("MonteCarlo.Analyzer", "MonteCarlo.Game"):
+            result = subprocess.run([sys.executable, "-c", script.replace("MonteCarlo.Analyzer", first, 1)],
+                                    cwd=package_parent, capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, result.stderr)
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=3)
\ No newline at end of file
@@ -0,0 +1,262 @@
+import numpy as np
+
+try:
+    from .Encoding import key_fits, key_space, encode_rows, decode_keys
+    from .Encoding import signature_fits, signature_space, encode_signatures, decode_signatures
+    from .Encoding import BINCOUNT_LIMIT, count_keys, merge_counts
+    from .Sketch import HeavyHitterReducer
+except ImportError:
+    from Encoding import key_fits, key_space, encode_rows, decode_keys
+    from Encoding import signature_fits, signature_space, encode_signatures, decode_signatures
+    from Encoding import BINCOUNT_LIMIT, count_keys, merge_counts
+    from Sketch import HeavyHitterReducer
+
+#names of the statistics that can be computed by a reducer
+STATISTICS = ("jackpot", "face_counts", "combo_count", "permutation_count")
+
+#names of the statistics kept in bounded memory by a heavy hitter sketch, only computed when asked for
+SKETCH_STATISTICS = ("top_combinations", "top_permutations")
+
+def make_reducers(statistics, num_faces, num_dice):
+    '''
+    PURPOSE
+    Create an empty reducer for each requested statistic.
+
+    INPUTS
+    statistics    a tuple naming the statistics, any of "jackpot", "face_counts", "combo_count", "permutation_count",
+                  "top_combinations" and "top_permutations".
+    num_faces     the number of faces on the dice.
+    num_dice      the number of dice rolled together.
+
+    OUTPUTS
+    a dictionary from statistic name to reducer, in the order the statistics were given.
+    '''
+    unknown = set(statistics) - set(STATISTICS) - set(SKETCH_STATISTICS)
+    if unknown:
+        raise ValueError("Unknown statistics: " + ", ".join(sorted(unknown)))
+    makers = {
+        "jackpot": lambda: JackpotReducer(num_faces),
+        "face_counts": lambda: FaceCountReducer(num_faces),
+        "combo_count": lambda: CombinationReducer(num_faces, num_dice),
+        "permutation_count": lambda: PermutationReducer(num_faces, num_dice),
+        "top_combinations": lambda: HeavyHitterReducer(num_faces, num_dice, combinations = True),
+        "top_permutations": lambda: HeavyHitterReducer(num_faces, num_dice),
+    }
+    return {name: makers[name]() for name in statistics}
+
+class JackpotReducer:
+    '''
+    The purpose of this file is to count jackpots one chunk of rolls at a time.
+
+    A reducer keeps a small running state that is updated with each chunk of face codes, so a play that does not fit
+    in memory can be analyzed as a stream. Reducers from different chunks or processes can be merged.
+
+    Summary: This class can count jackpots per face over any number of chunks of face codes.
+    '''
+    def __init__(self, num_faces, chunk_rows = 2**20):
+        '''
+        PURPOSE
+        Create an empty jackpot reducer.
+
+        INPUTS
+        num_faces     the number of faces on the dice.
+        chunk_rows    optional integer, rows are scanned in blocks of this size to keep temporary arrays small.
+        '''
+        self.num_faces = num_faces
+        self.chunk_rows = chunk_rows
+        self.rolls = 0
+        self.jackpots = np.zeros(num_faces, dtype=np.int64)
+
+    def update(self, codes):
+        '''
+        PURPOSE
+        Add the jackpots in a chunk of face codes. Every die column is compared with the first die column.
+
+        INPUTS
+        codes    a numpy array of face codes with one row per roll and one column per die.
+        '''
+        for start in range(0, codes.shape[0], self.chunk_rows):
+            block = codes[start:start + self.chunk_rows]
+            first = block[:, 0]
+            same = np.ones(len(block), dtype=bool)
+            for die in range(1, block.shape[1]):
+                same &= block[:, die] == first
+            self.jackpots += np.bincount(first[same], minlength=self.num_faces)
+        self.rolls += codes.shape[0]
+        return self
+
+    def merge(self, other):
+        '''
+        PURPOSE
+        Add the counts of another jackpot reducer to this one.
+        '''
+        self.jackpots += other.jackpots
+        self.rolls += other.rolls
+        return self
+
+
+class FaceCountReducer:
+    '''
+    The purpose of this file is to count how many times each face is rolled, one chunk of rolls at a time.
+
+    Summary: This class can count the faces rolled by all dice over any number of chunks of face codes.
+    '''
+    def __init__(self, num_faces):
+        '''
+        PURPOSE
+        Create an empty face count reducer.
+
+        INPUTS
+        num_faces     the number of faces on the dice.
+        '''
+        self.num_faces = num_faces
+        self.rolls = 0
+        self.counts = np.zeros(num_faces, dtype=np.int64)
+
+    def update(self, codes):
+        '''
+        PURPOSE
+        Add the faces rolled in a chunk of face codes.
+        '''
+        self.counts += np.bincount(codes.ravel(), minlength=self.num_faces)
+        self.rolls += codes.shape[0]
+        return self
+
+    def merge(self, other):
+        '''
+        PURPOSE
+        Add the counts of another face count reducer to this one.
+        '''
+        self.counts += other.counts
+        self.rolls += other.rolls
+        return self
+
+
+class KeyCountReducer:
+    '''
+    The purpose of this file is to count distinct rolls, one chunk of rolls at a time.
+
+    Each roll is encoded as one integer key. Small key spaces are counted in a dense array, larger ones as sorted
+    distinct keys with their counts. When the keys would not fit in an int64 the distinct rows are counted in a
+    dictionary instead. PermutationReducer and CombinationReducer choose how a roll is turned into a key.
+
+    Summary: This class can count distinct rolls over any number of chunks of face codes and return the distinct rows.
+    '''
+    def __init__(self, num_faces, num_dice):
+        '''
+        PURPOSE
+        Create an empty reducer.
+
+        INPUTS
+        num_faces     the number of faces on the dice.
+        num_dice      the number of dice rolled together.
+        '''
+        self.num_faces = num_faces
+        self.num_dice = num_dice
+        self.rolls = 0
+        if not self._fits():
+            self._mode = "rows"
+            self._rows = {}
+        elif self._space() <= BINCOUNT_LIMIT:
+            self._mode = "dense"
+            self._dense = np.zeros(self._space(), dtype=np.int64)
+        else:
+            self._mode = "sparse"
+            self._keys = np.zeros(0, dtype=np.int64)
+            self._counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, codes):
+        '''
+        PURPOSE
+        Add the rolls in a chunk of face codes.
+
+        INPUTS
+        codes    a numpy array of face codes with one row per roll and one column per die.
+        '''
+        if self._mode == "rows":
+            rows, counts = np.unique(self._canonical(codes), axis=0, return_counts=True)
+            for row, count in zip(map(tuple, rows.tolist()), counts.tolist()):
+                self._rows[row] = self._rows.get(row, 0) + count
+        elif self._mode == "dense":
+            self._dense += np.bincount(self._encode(codes), minlength=len(self._dense))
+        else:
+            keys, counts = count_keys(self._encode(codes), self._space())
+            self._keys, self._counts = merge_counts(self._keys, self._counts, keys, counts)
+        self.rolls += codes.shape[0]
+        return self
+
+    def merge(self, other):
+        '''
+        PURPOSE
+        Add the counts of another reducer of the same type and shape to this one.
+        '''
+        if self._mode == "rows":
+            for row, count in other._rows.items():
+                self._rows[row] = self._rows.get(row, 0) + count
+        elif self._mode == "dense":
+            self._dense += other._dense
+        else:
+            self._keys, self._counts = merge_counts(self._keys, self._counts, other._keys, other._counts)
+        self.rolls += other.rolls
+        return self
+
+    def result(self):
+        '''
+        PURPOSE
+        Return the distinct rolls counted so far.
+
+        OUTPUTS
+        two numpy arrays, a matrix of face codes with one row per distinct roll and the count of each row.
+        '''
+        if self._mode == "rows":
+            rows = sorted(self._rows)
+            counts = np.array([self._rows[row] for row in rows], dtype=np.int64)
+            return np.array(rows, dtype=np.int64).reshape(len(rows), self.num_dice), counts
+        if self._mode == "dense":
+            keys = np.flatnonzero(self._dense)
+            counts = self._dense[keys]
+        else:
+            keys, counts = self._keys, self._counts
+        return self._decode(keys), counts
+
+
+class PermutationReducer(KeyCountReducer):
+    '''
+    The purpose of this file is to count permutations, one chunk of rolls at a time.
+    A roll's key is its mixed-radix number with one digit per die.
+    '''
+    def _fits(self):
+        return key_fits(self.num_faces, self.num_dice)
+
+    def _space(self):
+        return key_space(self.num_faces, self.num_dice)
+
+    def _encode(self, codes):
+        return encode_rows(codes, self.num_faces)
+
+    def _decode(self, keys):
+        return decode_keys(keys, self.num_faces, self.num_dice)
+
+    def _canonical(self, codes):
+        return codes
+
+
+class CombinationReducer(KeyCountReducer):
+    '''
+    The purpose of this file is to count combinations, one chunk of rolls at a time.
+    A roll's key is the encoded face-count vector of the roll, so the order of the dice does not matter.
+    '''
+    def _fits(self):
+        return signature_fits(self.num_faces, self.num_dice)
+
+    def _space(self):
+        return signature_space(self.num_faces, self.num_dice)
+
+    def _encode(self, codes):
+        return encode_signatures(codes, self.num_faces)
+
+    def _decode(self, keys):
+        return decode_signatures(keys, self.num_faces, self.num_dice)
+
+    def _canonical(self, codes):
+        return np.sort(codes, axis=1)
@@ -0,0 +1,300 @@
+import numpy as np
+
+#shared generator used when a roll is not given its own generator or seed
+_rng = np.random.default_rng()
+
+def get_rng(rng = None):
+    '''
+    PURPOSE
+    Return the numpy.random.Generator to roll with.
+
+    INPUTS
+    rng    None for the module's shared generator, or a numpy.random.Generator, SeedSequence or integer seed.
+    '''
+    if rng is None:
+        return _rng
+    return np.random.default_rng(rng)
+
+#rolls per block of a seekable play, every block draws from its own Philox counter
+SEEK_BLOCK_ROWS = 2**16
+
+def counter_uniforms(seed, start, stop, num_dice, block_rows = SEEK_BLOCK_ROWS):
+    '''
+    PURPOSE
+    Draw the uniform random numbers of rolls start to stop of a seekable play. A seekable play uses NumPy's
+    counter-based Philox generator: the seed sets the key and the rolls are split into blocks of block_rows rolls,
+    block b starting from the counter [0, 0, 0, b]. Any range of rolls can be drawn by starting at the blocks that hold
+    it, without drawing the rolls before it, and always gets the same numbers for the same seed.
+
+    INPUTS
+    seed          an integer seed, the key of the generator.
+    start         the first roll, counting from 0.
+    stop          one past the last roll.
+    num_dice      the number of uniform numbers per roll.
+    block_rows    optional integer, the number of rolls per counter block. Must be the same to get the same rolls.
+
+    OUTPUTS
+    a numpy array of floats in [0, 1) with shape (stop - start, num_dice).
+    '''
+    if start < 0 or stop < start:
+        raise ValueError("The roll range must satisfy 0 <= start <= stop")
+    key = np.random.SeedSequence(seed).generate_state(2, np.uint64)
+    uniforms = np.empty((stop - start, num_dice))
+    for block in range(start // block_rows, -(-stop // block_rows)):
+        first = block * block_rows
+        low, high = max(start, first), min(stop, first + block_rows)
+        generator = np.random.Generator(np.random.Philox(key=key, counter=[0, 0, 0, block]))
+        #a block is drawn from its first roll, so the rolls before low in the block are drawn and dropped
+        uniforms[low - start:high - start] = generator.random((high - first, num_dice))[low - first:]
+    return uniforms
+
+def code_dtype(num_faces):
+    '''
+    PURPOSE
+    Return the smallest unsigned integer dtype that can hold a face index for a die with num_faces faces.
+    '''
+    if num_faces <= 2**8:
+        return np.dtype(np.uint8)
+    if num_faces <= 2**16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+def stratified_uniforms(num_of_rolls, num_dice, rng):
+    '''
+    PURPOSE
+    Draw uniform random numbers stratified separately for every die (Latin hypercube sampling). The interval [0, 1) is
+    cut into num_of_rolls equal strata and every die gets exactly one number in each stratum, in a random order.
+    Each number is still uniform on its own, so estimates stay unbiased. Turned into faces by an inverse CDF
+    (see sample_tilted), every stratum maps to one face, so every die covers its faces more evenly than with
+    independent draws. An alias table does not keep the order of the numbers and loses this property.
+
+    OUTPUTS
+    a numpy array of floats in [0, 1) with shape (num_of_rolls, num_dice).
+    '''
+    strata = np.argsort(rng.random((num_of_rolls, num_dice)), axis=0)
+    return (strata + rng.random((num_of_rolls, num_dice))) / max(num_of_rolls, 1)
+
+def antithetic_uniforms(num_of_rolls, num_dice, rng):
+    '''
+    PURPOSE
+    Draw uniform random numbers in antithetic pairs. Rows 2i and 2i + 1 use u and 1 - u. Turned into faces by an
+    inverse CDF (see sample_tilted), which is increasing in u, the faces of the two rolls of a pair are negatively
+    correlated and the average of a pair varies less than the average of two independent rolls.
+
+    OUTPUTS
+    a numpy array of floats in [0, 1) with shape (num_of_rolls, num_dice). num_of_rolls must be even.
+    '''
+    if num_of_rolls % 2:
+        raise ValueError("Antithetic sampling needs an even num_of_rolls")
+    half = rng.random((num_of_rolls // 2, num_dice))
+    uniforms = np.empty((num_of_rolls, num_dice))
+    uniforms[0::2] = half
+    #1 - u can only reach 1.0 when u is exactly 0, keep it inside [0, 1)
+    uniforms[1::2] = np.minimum(1.0 - half, np.nextafter(1.0, 0.0))
+    return uniforms
+
+def sample_tilted(probabilities, uniforms, mixture = None, tilts = None):
+    '''
+    PURPOSE
+    Turn uniform random numbers into face codes by inverse CDF sampling, from a probability matrix or from a mixture of
+    it and its tilted versions (see Exact.jackpot_proposal). In the component of face f every die d lands on f with
+    chance tilts[d, f] and on the other faces in proportion to their probabilities. The first column of the uniforms
+    picks the component of each roll and every other column picks the face of one die, so a larger number always gives
+    a face further along the faces array. Only the cumulative probabilities are built, so memory does not grow with the
+    number of components.
+
+    INPUTS
+    probabilities    a probability matrix with one row per die and one column per face.
+    uniforms         a numpy array of floats in [0, 1) with one row per roll and one column more than there are dice.
+    mixture          optional array with the weight of the probabilities and then of the component of every face,
+                     summing to one. Defaults to every roll using the probabilities.
+    tilts            optional matrix of the same shape as probabilities, needed with a mixture.
+
+    OUTPUTS
+    a numpy array of face codes with one row per roll and one column per die.
+    '''
+    num_dice, num_faces = probabilities.shape
+    cumulative = np.cumsum(probabilities, axis=1)
+    if mixture is None:
+        picks = np.zeros(len(uniforms), dtype=np.intp)
+    else:
+        picks = np.minimum(np.searchsorted(np.cumsum(mixture), uniforms[:, 0], side="right"), len(mixture) - 1)
+    #the untilted component is the same as tilting every die toward face 0 by its own chance of face 0
+    faces = np.maximum(picks - 1, 0)
+    codes = np.empty((len(uniforms), num_dice), dtype=np.intp)
+    for die in range(num_dice):
+        on_face = probabilities[die, faces]
+        tilt = on_face if mixture is None else np.where(picks > 0, tilts[die, faces], on_face)
+        u = uniforms[:, die + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(on_face < 1, (1 - tilt) / (1 - on_face), 1.0)
+            below = scale * (cumulative[die, faces] - on_face)
+            #the cumulative weights below the tilted face are scaled down, then the face itself, then the rest
+            target = np.where(u < below, u / scale, (u - below - tilt) / scale + cumulative[die, faces])
+            found = np.searchsorted(cumulative[die], target, side="right")
+        codes[:, die] = np.where((u >= below) & (u < below + tilt), faces, found)
+    #rounding can leave the last cumulative weight just below 1
+    return np.minimum(codes, num_faces - 1)
+
+class AliasTable:
+    '''
+    The purpose of this file is to sample the faces of a weighted die quickly.
+
+    An alias table (Walker's alias method, using Vose's construction) is built once from the weights of a die.
+    Every face gets a column holding a keep probability and an alias face. A roll picks a column uniformly
+    and either keeps that face or takes its alias, so each roll costs the same no matter how many faces the die has.
+
+    Summary: This class can build an alias table from a set of weights and turn uniform random numbers into face indices.
+    '''
+    def __init__(self, weights):
+        '''
+        PURPOSE
+        Build the alias table for a set of face weights.
+
+        INPUTS
+        weights    a one dimensional array of non-negative numeric weights, one per face. At least one weight must be positive.
+        '''
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or len(weights) == 0:
+            raise ValueError("The weights must be a one dimensional array with at least one value")
+        if not np.isfinite(weights).all() or (weights < 0).any():
+            raise ValueError("The weights must be finite and non-negative")
+        total = weights.sum()
+        if total <= 0:
+            raise ValueError("At least one weight must be positive")
+
+        num_faces = len(weights)
+        scaled = (weights * (num_faces / total)).tolist()
+        prob = [1.0] * num_faces
+        alias = list(range(num_faces))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+
+        #pair every under-full column with an over-full face until one of the lists runs out
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        #anything left over is full up to rounding error and keeps its own face
+
+        self.num_faces = num_faces
+        self.prob = np.array(prob, dtype=np.float64)
+        self.alias = np.array(alias, dtype=np.intp)
+
+    def sample(self, uniforms):
+        '''
+        PURPOSE
+        Turn uniform random numbers into face indices, using one uniform number per roll.
+
+        INPUTS
+        uniforms    a numpy array of floats in [0, 1), any shape.
+
+        OUTPUTS
+        a numpy array of face indices with the same shape as uniforms.
+        '''
+        scaled = np.asarray(uniforms) * self.num_faces
+        column = scaled.astype(np.intp)
+        np.minimum(column, self.num_faces - 1, out=column)
+        keep = (scaled - column) < self.prob[column]
+        return np.where(keep, column, self.alias[column])
+
+    def draw(self, num_of_rolls, rng):
+        '''
+        PURPOSE
+        Draw face indices for a number of rolls.
+
+        INPUTS
+        num_of_rolls    the number of rolls to draw.
+        rng             a numpy.random.Generator used to draw the uniform numbers.
+
+        OUTPUTS
+        a numpy array of face indices, one per roll.
+        '''
+        return self.sample(rng.random(num_of_rolls))
+
+
+class StackedAliasTable:
+    '''
+    The purpose of this file is to roll several similar dice together.
+
+    The alias tables of the dice are stacked into one (number of dice x number of faces) keep probability matrix and one
+    alias matrix, so the faces for every die and every roll can be drawn in a single vectorized pass.
+
+    Summary: This class can stack the alias tables of similar dice and turn a matrix of uniform random numbers into a
+    matrix of face indices.
+    '''
+    def __init__(self, tables):
+        '''
+        PURPOSE
+        Stack the alias tables of several dice.
+
+        INPUTS
+        tables    a list of AliasTable objects that all have the same number of faces.
+        '''
+        if len(tables) == 0:
+            raise ValueError("At least one alias table is needed")
+        num_faces = tables[0].num_faces
+        if any(table.num_faces != num_faces for table in tables):
+            raise ValueError("All alias tables must have the same number of faces")
+
+        self.num_faces = num_faces
+        self.num_dice = len(tables)
+        self.prob = np.vstack([table.prob for table in tables])
+        self.alias = np.vstack([table.alias for table in tables])
+        #offset of each die's row in the flattened matrices
+        self._row_offsets = np.arange(self.num_dice, dtype=np.intp) * num_faces
+
+    def sample(self, uniforms):
+        '''
+        PURPOSE
+        Turn a matrix of uniform random numbers into face indices, using one uniform number per die per roll.
+
+        INPUTS
+        uniforms    a numpy array of floats in [0, 1) with shape (number of rolls, number of dice).
+
+        OUTPUTS
+        a numpy array of face indices with the same shape as uniforms, column i holds the faces rolled by die i.
+        '''
+        scaled = np.asarray(uniforms) * self.num_faces
+        column = scaled.astype(np.intp)
+        np.minimum(column, self.num_faces - 1, out=column)
+        flat = column + self._row_offsets
+        keep = (scaled - column) < self.prob.ravel()[flat]
+        return np.where(keep, column, self.alias.ravel()[flat])
+
+    def draw(self, num_of_rolls, rng):
+        '''
+        PURPOSE
+        Draw face indices for every die for a number of rolls.
+
+        INPUTS
+        num_of_rolls    the number of rolls to draw.
+        rng             a numpy.random.Generator used to draw the uniform numbers.
+
+        OUTPUTS
+        a numpy array of face indices with shape (num_of_rolls, number of dice).
+        '''
+        return self.sample(rng.random((num_of_rolls, self.num_dice)))
+
+    def stream(self, num_of_rolls, chunk_size, rng, dtype):
+        '''
+        PURPOSE
+        Draw face indices for every die for a number of rolls, handing them out in chunks.
+
+        INPUTS
+        num_of_rolls    the number of rolls to draw.
+        chunk_size      the number of rolls in each chunk. The last chunk may be smaller.
+        rng             a numpy.random.Generator used to draw the uniform numbers.
+        dtype           the integer dtype of the returned face codes.
+
+        OUTPUTS
+        a generator of numpy arrays of face indices, each with shape (rolls in the chunk, number of dice).
+        '''
+        for start in range(0, num_of_rolls, chunk_size):
+            yield self.draw(min(chunk_size, num_of_rolls - start), rng).astype(dtype)
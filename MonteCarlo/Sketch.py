@@ -0,0 +1,291 @@
+import numpy as np
+
+try:
+    from .Encoding import key_fits, encode_rows, decode_keys
+    from .Encoding import signature_fits, encode_signatures, decode_signatures
+except ImportError:
+    from Encoding import key_fits, encode_rows, decode_keys
+    from Encoding import signature_fits, encode_signatures, decode_signatures
+
+#odd 64 bit constant used to fold a row of face codes into one hash (the golden ratio scaled to 2**64)
+_ROW_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+class SpaceSaving:
+    '''
+    The purpose of this file is to keep approximate counts of the most frequent keys in a fixed amount of memory.
+
+    The summary holds at most capacity keys, each with a count that is never below the true count and an error, the
+    most the count can be above the true count. Every chunk of keys is counted exactly and merged into the summary,
+    and only the capacity keys with the largest counts are kept. A key that is not in a full summary was seen at most
+    floor() times. Summaries of different chunks or processes can be merged with the same guarantees.
+
+    Summary: This class can count the heavy hitters of a stream of keys and give bounds on their true counts.
+    '''
+    def __init__(self, capacity = 1024, key_columns = None):
+        '''
+        PURPOSE
+        Create an empty summary.
+
+        INPUTS
+        capacity       optional integer, the largest number of keys kept.
+        key_columns    optional integer, the number of columns of each key when keys are rows of a matrix.
+                       Defaults to keys that are single integers.
+        '''
+        if capacity < 1:
+            raise ValueError("The capacity must be at least 1")
+        self.capacity = capacity
+        self.key_columns = key_columns
+        shape = (0,) if key_columns is None else (0, key_columns)
+        self.keys = np.zeros(shape, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.errors = np.zeros(0, dtype=np.int64)
+
+    def floor(self):
+        '''
+        PURPOSE
+        Return the most times a key that is not in the summary can have been seen.
+        '''
+        return int(self.counts.min()) if len(self.counts) == self.capacity else 0
+
+    def update(self, keys):
+        '''
+        PURPOSE
+        Add a chunk of keys to the summary.
+
+        INPUTS
+        keys    a numpy array of integer keys, or a matrix with one key per row when the summary has key_columns.
+        '''
+        distinct, counts = np.unique(keys, axis=0, return_counts=True)
+        return self._combine(distinct, counts.astype(np.int64), np.zeros(len(counts), dtype=np.int64), 0)
+
+    def merge(self, other):
+        '''
+        PURPOSE
+        Add another summary with the same capacity and key shape to this one.
+        '''
+        if other.capacity != self.capacity or other.key_columns != self.key_columns:
+            raise ValueError("Only summaries with the same capacity and key shape can be merged")
+        return self._combine(other.keys, other.counts, other.errors, other.floor())
+
+    def _combine(self, keys, counts, errors, floor):
+        '''
+        PURPOSE
+        Merge distinct keys with their counts and errors into the summary. A key missing from one side gets that side's
+        floor added to its count and error, and the keys with the largest counts are kept.
+        '''
+        own_floor = self.floor()
+        distinct, inverse = np.unique(np.concatenate([self.keys, keys]), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        own, other = inverse[:len(self.keys)], inverse[len(self.keys):]
+        merged_counts = np.full(len(distinct), own_floor + floor, dtype=np.int64)
+        merged_errors = merged_counts.copy()
+        merged_counts[own] += self.counts - own_floor
+        merged_errors[own] += self.errors - own_floor
+        merged_counts[other] += counts - floor
+        merged_errors[other] += errors - floor
+        #largest counts first, ties kept in key order
+        keep = np.argsort(-merged_counts, kind="stable")[:self.capacity]
+        self.keys = distinct[keep]
+        self.counts = merged_counts[keep]
+        self.errors = merged_errors[keep]
+        return self
+
+
+class CountMinSketch:
+    '''
+    The purpose of this file is to estimate the count of any key in a fixed amount of memory.
+
+    The sketch is a table of depth rows and width columns. Every key adds one to one column in each row, chosen by a
+    multiply-shift hash with its own multiplier per row, and the estimate of a key is the smallest of its columns.
+    An estimate is never below the true count and, with probability at least 1 - exp(-depth), is at most
+    e / width * total above it. Sketches with the same width, depth and seed can be merged by adding their tables.
+
+    Summary: This class can count a stream of integer keys and estimate the count of any key.
+    '''
+    def __init__(self, width = 2**14, depth = 4, seed = 0):
+        '''
+        PURPOSE
+        Create an empty sketch.
+
+        INPUTS
+        width    optional integer, the number of columns, a power of two of at least 2.
+        depth    optional integer, the number of rows.
+        seed     optional integer seed of the hash functions. Sketches must share it to be merged.
+        '''
+        if width < 2 or width & (width - 1):
+            raise ValueError("The width must be a power of two of at least 2")
+        if depth < 1:
+            raise ValueError("The depth must be at least 1")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        limit = np.iinfo(np.uint64).max
+        self._multipliers = rng.integers(0, limit, size=depth, dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self._offsets = rng.integers(0, limit, size=depth, dtype=np.uint64, endpoint=True)
+        self._shift = np.uint64(64 - (width.bit_length() - 1))
+
+    def _columns(self, keys):
+        '''
+        PURPOSE
+        Hash integer keys to one column per row of the table.
+        '''
+        keys = np.asarray(keys).astype(np.uint64)
+        columns = (keys[None, :] * self._multipliers[:, None] + self._offsets[:, None]) >> self._shift
+        return columns.astype(np.intp)
+
+    def update(self, keys):
+        '''
+        PURPOSE
+        Add a chunk of integer keys to the sketch.
+        '''
+        for row, columns in enumerate(self._columns(keys)):
+            self.table[row] += np.bincount(columns, minlength=self.width)
+        self.total += len(keys)
+        return self
+
+    def merge(self, other):
+        '''
+        PURPOSE
+        Add another sketch with the same width, depth and seed to this one.
+        '''
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError("Only sketches with the same width, depth and seed can be merged")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def estimate(self, keys):
+        '''
+        PURPOSE
+        Estimate the counts of integer keys.
+
+        OUTPUTS
+        a numpy array of counts, each at least the true count of its key.
+        '''
+        columns = self._columns(keys)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def error_bound(self):
+        '''
+        PURPOSE
+        Return the most an estimate is above the true count with probability at least 1 - exp(-depth).
+        '''
+        return np.e / self.width * self.total
+
+
+class HeavyHitterReducer:
+    '''
+    The purpose of this file is to find the most frequent permutations or combinations in bounded memory, one chunk
+    of rolls at a time.
+
+    Each roll is encoded as one key, like in PermutationReducer and CombinationReducer, and counted by a SpaceSaving
+    summary, which finds the candidates, and a CountMinSketch, which tightens their upper bounds. Memory depends on
+    capacity, width and depth, not on the number of distinct rolls. When the keys would not fit in an int64 the rolls
+    themselves are kept and folded into one hash for the sketch. Reducers with the same settings can be merged.
+
+    Summary: This class can report the top permutations or combinations of any number of chunks of face codes with
+    bounds on their counts.
+    '''
+    def __init__(self, num_faces, num_dice, combinations = False, capacity = 1024, width = 2**14, depth = 4, seed = 0):
+        '''
+        PURPOSE
+        Create an empty heavy hitter reducer.
+
+        INPUTS
+        num_faces       the number of faces on the dice.
+        num_dice        the number of dice rolled together.
+        combinations    optional boolean, when True rolls are counted as combinations (order-independent),
+                        otherwise as permutations.
+        capacity        optional integer, the number of candidate rolls kept by the SpaceSaving summary.
+        width           optional integer, the width of the CountMinSketch, a power of two.
+        depth           optional integer, the depth of the CountMinSketch.
+        seed            optional integer seed of the CountMinSketch hash functions.
+        '''
+        self.num_faces = num_faces
+        self.num_dice = num_dice
+        self.combinations = combinations
+        self.rolls = 0
+        fits = signature_fits(num_faces, num_dice) if combinations else key_fits(num_faces, num_dice)
+        self._mode = "keys" if fits else "rows"
+        self.summary = SpaceSaving(capacity, None if fits else num_dice)
+        self.sketch = CountMinSketch(width, depth, seed)
+
+    def _keys(self, codes):
+        '''
+        PURPOSE
+        Encode a chunk of face codes as one key per roll, or as canonical rows when keys would not fit in an int64.
+        '''
+        if self._mode == "rows":
+            return np.sort(codes, axis=1).astype(np.int64) if self.combinations else codes.astype(np.int64)
+        if self.combinations:
+            return encode_signatures(codes, self.num_faces)
+        return encode_rows(codes, self.num_faces)
+
+    def _hashes(self, keys):
+        '''
+        PURPOSE
+        Turn keys into the integers counted by the sketch. Rows are folded into one 64 bit hash.
+        '''
+        if self._mode == "keys":
+            return keys
+        hashes = np.zeros(len(keys), dtype=np.uint64)
+        for column in keys.T:
+            hashes = hashes * _ROW_HASH_MULTIPLIER + column.astype(np.uint64)
+        return hashes
+
+    def update(self, codes):
+        '''
+        PURPOSE
+        Add the rolls in a chunk of face codes.
+
+        INPUTS
+        codes    a numpy array of face codes with one row per roll and one column per die.
+        '''
+        keys = self._keys(codes)
+        self.summary.update(keys)
+        self.sketch.update(self._hashes(keys))
+        self.rolls += codes.shape[0]
+        return self
+
+    def merge(self, other):
+        '''
+        PURPOSE
+        Add the counts of another heavy hitter reducer with the same settings to this one.
+        '''
+        if other.combinations != self.combinations:
+            raise ValueError("Only reducers that count the same kind of roll can be merged")
+        self.summary.merge(other.summary)
+        self.sketch.merge(other.sketch)
+        self.rolls += other.rolls
+        return self
+
+    def result(self, k = None):
+        '''
+        PURPOSE
+        Return the most frequent rolls counted so far with bounds on their counts.
+
+        INPUTS
+        k    optional integer, the number of rolls to return. Defaults to every roll in the summary.
+
+        OUTPUTS
+        four values: a matrix of face codes with one row per roll, most frequent first, the estimated count of each row
+        (its upper bound), the lower bound of each count, and the most times a roll that is not returned can have been
+        rolled.
+        '''
+        keys = self.summary.keys
+        upper = np.minimum(self.summary.counts, self.sketch.estimate(self._hashes(keys)))
+        lower = self.summary.counts - self.summary.errors
+        order = np.argsort(-upper, kind="stable")
+        unlisted = max([self.summary.floor()] + upper[order[k:]].tolist()[:1]) if k is not None else self.summary.floor()
+        order = order[:k]
+        keys = keys[order]
+        if self._mode == "rows":
+            rows = keys
+        elif self.combinations:
+            rows = decode_signatures(keys, self.num_faces, self.num_dice)
+        else:
+            rows = decode_keys(keys, self.num_faces, self.num_dice)
+        return rows, upper[order], lower[order], unlisted
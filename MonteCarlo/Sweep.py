@@ -0,0 +1,105 @@
+import numpy as np
+
+try:
+    from .Sampler import get_rng, code_dtype
+except ImportError:
+    from Sampler import get_rng, code_dtype
+
+#largest number of uniform numbers drawn at once, the rolls of a sweep are split into chunks below this size
+CHUNK_DRAWS = 2**22
+
+def _check_weights(faces, weights):
+    '''
+    PURPOSE
+    Check a scenario weight tensor and turn it into cumulative probabilities, one row per scenario and die.
+    '''
+    if not isinstance(faces, np.ndarray):
+        raise TypeError("The faces must be a numpy array")
+    if len(np.unique(faces)) != len(faces):
+        raise ValueError("The faces must be unique values")
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.ndim != 3 or weights.shape[2] != len(faces) or 0 in weights.shape:
+        raise ValueError("The weights must have the shape (scenarios, dice, faces)")
+    if not np.isfinite(weights).all() or (weights < 0).any():
+        raise ValueError("The weights must be finite and non-negative")
+    totals = weights.sum(axis=2, keepdims=True)
+    if (totals <= 0).any():
+        raise ValueError("Every die in every scenario needs at least one positive weight")
+    return weights / totals
+
+def _draw_codes(cumulative, num_of_rolls, rng):
+    '''
+    PURPOSE
+    Draw face codes for every scenario and die at once with one searchsorted call. Row r of the cumulative
+    probabilities is shifted up by r, so the rows laid end to end form one increasing array, and a uniform number
+    shifted by the same r can only land inside row r.
+
+    INPUTS
+    cumulative      a numpy array of cumulative probabilities with one row per scenario and die, each ending at 1.
+    num_of_rolls    the number of rolls to draw for every row.
+    rng             a numpy.random.Generator.
+
+    OUTPUTS
+    a numpy array of face codes with one row per scenario and die and one column per roll.
+    '''
+    rows, num_faces = cumulative.shape
+    shift = np.arange(rows, dtype=np.float64)[:, None]
+    targets = rng.random((rows, num_of_rolls)) + shift
+    positions = np.searchsorted((cumulative + shift).ravel(), targets.ravel(), side="right").reshape(rows, num_of_rolls)
+    codes = positions - np.arange(rows, dtype=np.intp)[:, None] * num_faces
+    #rounding in the shifted sums can push a number just past the end of its row
+    np.clip(codes, 0, num_faces - 1, out=codes)
+    return codes
+
+def run_sweep(faces, weights, num_of_rolls, rng = None):
+    '''
+    PURPOSE
+    Play many dice configurations (scenarios) at once and summarize every play, without creating Die, Game or Analyzer
+    objects. Every scenario rolls its own set of similar dice num_of_rolls times. The rolls of all scenarios are drawn
+    together in vectorized chunks and reduced to jackpot and face counts as they are drawn, so only one chunk of rolls
+    is held in memory at a time.
+
+    INPUTS
+    faces           a numpy array of unique face values shared by every die in every scenario.
+    weights         an array of non-negative weights with the shape (scenarios, dice, faces). weights[s, d] holds the
+                    weights of die d in scenario s.
+    num_of_rolls    an integer to specify how many times the dice of every scenario should be rolled.
+    rng             optional numpy.random.Generator or integer seed. Defaults to the shared generator.
+
+    OUTPUTS
+    a tidy dataframe with a multiindex of scenario and face and one row per pair. The columns are Jackpots (jackpots on
+    that face), Expected Jackpots (the exact expected number from the weights), Counts (times the face was rolled by
+    any die) and Expected Counts.
+    '''
+    import pandas as pd
+    probabilities = _check_weights(faces, weights)
+    if num_of_rolls < 0:
+        raise ValueError("The num_of_rolls must not be negative")
+    num_scenarios, num_dice, num_faces = probabilities.shape
+    rng = get_rng(rng)
+
+    cumulative = np.cumsum(probabilities, axis=2).reshape(-1, num_faces)
+    cumulative[:, -1] = 1.0
+    #offset of each scenario's faces in the flattened count arrays
+    scenario_offsets = (np.arange(num_scenarios, dtype=np.intp) * num_faces)[:, None, None]
+    jackpots = np.zeros(num_scenarios * num_faces, dtype=np.int64)
+    counts = np.zeros(num_scenarios * num_faces, dtype=np.int64)
+
+    chunk_size = max(1, CHUNK_DRAWS // (num_scenarios * num_dice))
+    for start in range(0, num_of_rolls, chunk_size):
+        rolls = min(chunk_size, num_of_rolls - start)
+        #(scenarios, rolls, dice) matrix of face codes, one play matrix per scenario
+        codes = _draw_codes(cumulative, rolls, rng).astype(code_dtype(num_faces))
+        codes = codes.reshape(num_scenarios, num_dice, rolls).transpose(0, 2, 1)
+        flat = codes + scenario_offsets
+        counts += np.bincount(flat.ravel(), minlength=len(counts))
+        same = (codes == codes[:, :, :1]).all(axis=2)
+        jackpots += np.bincount(flat[:, :, 0][same], minlength=len(jackpots))
+
+    index = pd.MultiIndex.from_product([range(num_scenarios), faces], names=['Scenario', 'Faces'])
+    return pd.DataFrame({
+        'Jackpots': jackpots,
+        'Expected Jackpots': num_of_rolls * probabilities.prod(axis=1).ravel(),
+        'Counts': counts,
+        'Expected Counts': num_of_rolls * probabilities.sum(axis=1).ravel(),
+    }, index=index)
@@ -0,0 +1,52 @@
+'''
+The MonteCarlo package gives access to the Die, Game and Analyzer classes and the run_sweep function.
+
+Nothing is imported until it is first used, so importing the package is fast. pandas is only imported when a
+dataframe is built, so code that only rolls dice and reads the face codes never pays for it.
+'''
+import importlib
+import sys
+import types
+
+#public name -> (module, attribute) it is loaded from
+_LAZY = {
+    "Die": ("Die", "Die"),
+    "Game": ("Game", "Game"),
+    "Analyzer": ("Analyzer", "Analyzer"),
+    "run_sweep": ("Sweep", "run_sweep"),
+    "Metrics": ("Metrics", None),
+}
+
+__all__ = list(_LAZY)
+
+def __getattr__(name):
+    '''
+    PURPOSE
+    Import a public class or function the first time it is asked for and keep it on the package.
+    '''
+    if name not in _LAZY:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    module_name, attribute = _LAZY[name]
+    module = importlib.import_module("." + module_name, __name__)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Package(types.ModuleType):
+    '''
+    The purpose of this class is to keep the public classes on the package when their modules are loaded.
+
+    Python binds every loaded submodule to its package under the submodule's name, so loading Game (which also loads
+    Die) would hide the Die and Game classes behind the modules of the same name, and from MonteCarlo import Die would
+    return a module. The package's module type binds the class of the same name instead.
+    '''
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and _LAZY.get(name, (None, None))[1] is not None:
+            value = getattr(value, _LAZY[name][1])
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = _Package
@@ -17,6 +17,8 @@ setup(
 
     license='MIT',
 
-    packages=['MonteCarlo']
+    packages=['MonteCarlo'],
+
+    package_data={'MonteCarlo': ['benchmark_baseline.json']}
 
 )
\ No newline at end of file